@@ -1,5 +1,3 @@
-from copy import copy
-
 from logics.classes.propositional import Formula
 
 
@@ -78,6 +76,8 @@ class PredicateFormula(Formula):
     >>> type(f)  # The original is unaffected, the function returns a new entity
     <class 'logics.classes.propositional.formula.Formula'>
     """
+    __slots__ = ()
+
     @property
     def is_atomic(self):
         """Same as in propositional ``Formula``. Overriden to work with this class.
@@ -196,35 +196,42 @@ class PredicateFormula(Formula):
         # Term
         if term is not None:
             # If you are evaluating a particular term, e.g. 'a' or ('f', ('g', 'x'))
-            # Atomic term, e.g. 'a'
-            if type(term) == str:
-                if language._is_valid_variable(term, allow_metavariables=True) and term not in _bound_variables:
-                    return {term}
-                return set()
-            # Molecular term ('f', ('g', 'x'))
-            for subterm in term:
-                free |= self.free_variables(language, term=subterm, _bound_variables=_bound_variables)
+            self._term_free_variables(term, language, _bound_variables, free)
             return free
 
+        self._free_variables(language, _bound_variables, free)
+        return free
+
+    def _free_variables(self, language, bound_variables, free):
+        # Adds the free variables of the formula to `free` (instead of building and joining a new set at each level)
         # Atomic
         if self.is_atomic:
             # If you are evaluating the entire atomic formula, evaluate each argument (incl the predicate)
             for argument in self:
-                free |= self.free_variables(language, term=argument, _bound_variables=_bound_variables)
-            return free
+                self._term_free_variables(argument, language, bound_variables, free)
+            return
 
         # Molecular
-        new_bound_variables = copy(_bound_variables)
-        if self.main_symbol in language.quantifiers:
+        if self[0] in language.quantifiers:
             # In case of a bounded quantifier, check for free variables in the bound (before adding to the bounded)
             if self[2] == '∈':
-                free |= self.free_variables(language, term=self[3], _bound_variables=_bound_variables)
-            # Quantified formula: add the quantified variable to bound_variables
-            new_bound_variables |= {self[1]}
-        # Return the varibles in each immediate subformula
+                self._term_free_variables(self[3], language, bound_variables, free)
+            # Quantified formula: add the quantified variable to the bound variables
+            bound_variables = bound_variables | {self[1]}
+        # Add the varibles in each immediate subformula
         for subformula in self.arguments():
-            free |= subformula.free_variables(language, _bound_variables=new_bound_variables)
-        return free
+            subformula._free_variables(language, bound_variables, free)
+
+    @staticmethod
+    def _term_free_variables(term, language, bound_variables, free):
+        # Atomic term, e.g. 'a'
+        if type(term) == str:
+            if term not in bound_variables and language._is_valid_variable(term, allow_metavariables=True):
+                free.add(term)
+            return
+        # Molecular term ('f', ('g', 'x'))
+        for subterm in term:
+            PredicateFormula._term_free_variables(subterm, language, bound_variables, free)
 
     def is_closed(self, language):
         """Determines if a formula is closed (i.e has no free variables)
@@ -271,9 +278,9 @@ class PredicateFormula(Formula):
             preds[self[0]] = len(self) - 1  # -1 because one position corresponds to the predicate
         # Molecular
         else:
-            # Add the constants in the arguments
+            # Add the predicates in the arguments (to the same dict)
             for arg in self.arguments(['∀', '∃']):
-                preds.update(arg.predicates_inside(preds))
+                arg.predicates_inside(preds)
         return preds
 
     def individual_constants_inside(self, language, ind_cts=None):
@@ -303,32 +310,30 @@ class PredicateFormula(Formula):
         # Atomic
         if self.is_atomic and len(self) > 1:  # if len is 1, it is a sentential mv, has no atomics
             for term in self[1:]:
-                ind_cts |= self._term_individual_constants_inside(term, language)
+                self._term_individual_constants_inside(term, language, ind_cts)
 
         # Molecular
         else:
             # Check the bound of quantified formulae
             if (self[0] == "∀" or self[0] == "∃") and self[2] == "∈":
-                ind_cts |= self._term_individual_constants_inside(self[3], language)
+                self._term_individual_constants_inside(self[3], language, ind_cts)
 
-            # Add the constants in the arguments
+            # Add the constants in the arguments (to the same set)
             for arg in self.arguments(language.quantifiers):
-                ind_cts |= arg.individual_constants_inside(language, ind_cts)
+                arg.individual_constants_inside(language, ind_cts)
 
         return ind_cts
 
-    def _term_individual_constants_inside(self, term, language, ind_cts=None):
+    def _term_individual_constants_inside(self, term, language, ind_cts):
+        # Adds the individual constants in the term to ind_cts
         if type(term) == str:
             if term in language.individual_constants:
-                return {term}
-            return set()
+                ind_cts.add(term)
         elif type(term) == tuple:
-            if ind_cts is None:
-                ind_cts = set()
             for subterm in term:
-                ind_cts |= self._term_individual_constants_inside(subterm, language, ind_cts)
-            return ind_cts
-        raise ValueError(f"Incorrect term {term}")
+                self._term_individual_constants_inside(subterm, language, ind_cts)
+        else:
+            raise ValueError(f"Incorrect term {term}")
 
     def contains_string(self, string):
         """Determines if a formula constains a given language item (useful, for various things internally),
@@ -430,43 +435,43 @@ class PredicateFormula(Formula):
         # Term
         if term is not None:
             # If you are substituting a particular term (e.g. 'a' or ('f', ('g', 'x'))
-            # Atomic term, e.g. 'a'
-            if type(term) == str:
-                if term == variable and term not in _bound_variables:
-                    return substitution
-                return term
-            # Molecular term ('f', ('g', 'x'))
-            newterm = list()
-            for subterm in term:
-                newterm.append(self.vsubstitute(variable, substitution, quantifiers=quantifiers,
-                                                term=subterm, _bound_variables=_bound_variables))
-            return tuple(newterm)
-        
+            return self._term_vsubstitute(term, variable, substitution, _bound_variables)
+
         if self.is_atomic:
             # If you are evaluating the entire atomic formula, evaluate each argument (incl the predicate)
-            new_formula = self.__class__()
-            for argument in self:
-                new_formula.append(self.vsubstitute(variable, substitution, quantifiers=quantifiers,
-                                                    term=argument,
-                                                    _bound_variables=_bound_variables))
-            return new_formula
+            return self.__class__([self._term_vsubstitute(argument, variable, substitution, _bound_variables)
+                                   for argument in self])
 
         # Molecular
         # First, copy everything that is not a subformula (connective, quantifier, variable, '∈', bound)
         new_formula = self.__class__([x for x in self if type(x) != self.__class__])
-        if self.main_symbol in quantifiers:
+        if self[0] in quantifiers:
             # In case of a bounded quantifier, substitute variables in the bound (before adding to the bounded)
             if self[2] == '∈':
-                new_formula[3] = self.vsubstitute(variable, substitution, quantifiers=quantifiers, term=self[3],
-                                                  _bound_variables=_bound_variables)
-            # Quantified formula: add the quantified variable to bound_variables
-            _bound_variables |= {self[1]}
+                new_formula[3] = self._term_vsubstitute(self[3], variable, substitution, _bound_variables)
+            # Quantified formula: the quantified variable is bound in the quantified subformula only (a new set, so
+            # that it does not remain bound in the sibling subformulae)
+            _bound_variables = _bound_variables | {self[1]}
         # Substitute each immediate subformula
-        for subformula in self.arguments():
+        for subformula in self.arguments(quantifiers):
             new_formula.append(subformula.vsubstitute(variable, substitution, quantifiers=quantifiers,
                                                       _bound_variables=_bound_variables))
         return new_formula
 
+    @staticmethod
+    def _term_vsubstitute(term, variable, substitution, bound_variables):
+        # Atomic term, e.g. 'a'
+        if type(term) == str:
+            if term == variable and term not in bound_variables:
+                return substitution
+            return term
+        # Molecular term ('f', ('g', 'x')). Terms are tuples, so if the variable is bound here (and there is nothing to
+        # substitute inside) the same term can be returned instead of rebuilt
+        if variable in bound_variables:
+            return term
+        return tuple([PredicateFormula._term_vsubstitute(subterm, variable, substitution, bound_variables)
+                      for subterm in term])
+
     def _molecular_instantiate(self, language, subst_dict):
         # Handle only the case of quantifiers, the rest is done by the super method
         if self[0] in language.quantifiers:
@@ -515,10 +520,7 @@ class PredicateFormula(Formula):
             return term
 
         elif type(term) == tuple:
-            new_terms = list()
-            for subterm in term[1:]:
-                new_terms.append(self._term_instantiate(subterm, language, subst_dict))
-            return (term[0], *new_terms)
+            return (term[0], *[self._term_instantiate(subterm, language, subst_dict) for subterm in term[1:]])
 
         raise ValueError("A term should be either a string or a tuple")
 
@@ -1,11 +1,27 @@
 """
 Classes for defining a predicate language
 """
-from itertools import chain
-
 from logics.classes.propositional.language import Language, InfiniteLanguage
 
 
+def _digit_suffix_base(string, bases):
+    """Returns the element of `bases` that `string` is equal to, or that `string` is followed by some digits of.
+    Returns ``None`` if there is no such element.
+
+    Strips the trailing digits one at a time and looks up each prefix, instead of slicing and comparing the string
+    against every element of `bases`.
+    """
+    if not isinstance(string, str):
+        return None
+    while string:
+        if string in bases:
+            return string
+        if not string[-1].isdigit():
+            return None
+        string = string[:-1]
+    return None
+
+
 class PredicateLanguage(Language):
     """Class for predicate languages with a finite number of predicates and individual constants.
 
@@ -188,13 +204,10 @@ class PredicateLanguage(Language):
             return self.predicate_letters[string]
         elif string in self.function_symbols:
             return self.function_symbols[string]
-        # Predicate variables can contain a digit afterwards
-        for v in self.predicate_variables:
-            if string == v:
-                return self.predicate_variables[v]
-            # We assume that X1 has the same arity as X
-            if string[:len(v)] == v and string[len(v):].isdigit():
-                return self.predicate_variables[v]
+        # Predicate variables can contain a digit afterwards. We assume that X1 has the same arity as X
+        v = _digit_suffix_base(string, self.predicate_variables)
+        if v is not None:
+            return self.predicate_variables[v]
         raise ValueError(f'Incorrect symbol {string}, does not have arity')
 
     def _is_term_well_formed(self, term):
@@ -253,7 +266,7 @@ class PredicateLanguage(Language):
 
     def _is_molecular_well_formed(self, formula, return_error):
         # We only need to take into account the case of quantified formulae, the rest is the same
-        if formula.main_symbol in self.quantifiers:
+        if formula[0] in self.quantifiers:
             if not self._is_valid_variable(formula[1], allow_metavariables=True):  # includes ind and pred metavariables
                 if not return_error:
                     return False
@@ -293,30 +306,18 @@ class PredicateLanguage(Language):
         """There is always an infinite supply of both individual and predicate variables"""
         if only_individual and only_predicate:
             raise ValueError("only_individual and only_predicate parameters cannot be both True")
-        elif only_individual:
-            bound = self.variables
-            meta_bound = self.variable_metavariables
-        elif only_predicate:
-            bound = self.predicate_variables
-            meta_bound = []
-        else:
-            bound = chain(self.variables, self.predicate_variables)
-            meta_bound = self.variable_metavariables
-        for vv in bound:
-            if string == vv:
-                return True
-            if string[:len(vv)] == vv and string[len(vv):].isdigit():
-                return True
-        if allow_metavariables:
-            for mv in meta_bound:
-                if string == mv:
-                    return True
-                # these canot have digits after
-        return False
+        if not only_predicate and _digit_suffix_base(string, self.variables) is not None:
+            return True
+        if not only_individual and _digit_suffix_base(string, self.predicate_variables) is not None:
+            return True
+        # Variable metavariables cannot have digits after
+        return allow_metavariables and not only_predicate and string in self.variable_metavariables
 
     def _is_valid_individual_constant_or_variable(self, string):
-        return self.is_valid_individual_constant(string) or self._is_valid_variable(string, only_individual=True,
-                                                                                    allow_metavariables=True)
+        # Variables first: they are plain lookups, while individual_constants may be a callable (e.g. a numeral check
+        # that raises and catches an exception for every non-numeral)
+        return self._is_valid_variable(string, only_individual=True, allow_metavariables=True) or \
+            self.is_valid_individual_constant(string)
 
     def is_metavariable_string(self, string):
         """Determines if a string is among the (individual/predicate/formula) metavariables of the language."""
@@ -351,30 +352,21 @@ class InfinitePredicateLanguage(PredicateLanguage, InfiniteLanguage):
     # Inherits from InfiniteLanguage only to have the overloaded is_metavariable_string method
 
     def arity(self, string):
-        # We consider only the case of predicate letters
-        for v in self.predicate_letters:
-            if string == v:
-                return self.predicate_letters[v]
-            # We assume that P1 has the same arity as P
-            if string[:len(v)] == v and string[len(v):].isdigit():
-                return self.predicate_letters[v]
+        # We consider only the case of predicate letters. We assume that P1 has the same arity as P
+        v = _digit_suffix_base(string, self.predicate_letters)
+        if v is not None:
+            return self.predicate_letters[v]
         return super().arity(string)
 
     def _is_valid_predicate(self, string):
-        for pred in chain(self.predicate_letters, self.predicate_variables):
-            if string == pred:
-                return True
-            if string[:len(pred)] == pred and string[len(pred):].isdigit():
-                return True
-        return False
+        return _digit_suffix_base(string, self.predicate_letters) is not None or \
+            _digit_suffix_base(string, self.predicate_variables) is not None
 
     def _is_valid_individual_constant_or_variable(self, string):
         if super()._is_valid_individual_constant_or_variable(string):
             return True
         if not callable(self.individual_constants):
-            for c in self.individual_constants:
-                if string[:len(c)] == c and string[len(c):].isdigit():
-                    return True
+            return _digit_suffix_base(string, self.individual_constants) is not None
         return False
 
 
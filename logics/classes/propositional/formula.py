@@ -29,13 +29,14 @@ class Formula(list):
     Working with Formula elements directly is somewhat uncomfortable and cumbersome. You may instead want to take a
     look at :doc:`parsers`. For random generation of formulae, see :doc:`formula_generators`
     """
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        for index in range(len(self)):
-            argument = self[index]
+        cls = self.__class__
+        for index, argument in enumerate(self):
             if type(argument) == list:
-                argument = self.__class__(argument)
-                self[index] = argument
+                self[index] = cls(argument)
 
     @property
     def is_atomic(self):
@@ -120,9 +121,12 @@ class Formula(list):
         >>> Formula(['∧', ['p'], ['~', ['A']]]).depth
         2
         """
-        if self.is_atomic:
+        # Atomics have no arguments of the same class
+        cls = self.__class__
+        argument_depths = [x.depth for x in self if type(x) == cls]
+        if not argument_depths:
             return 0
-        return max(x.depth for x in [x for x in self if type(x) == type(self)]) + 1
+        return max(argument_depths) + 1
 
     @property
     def level(self):
@@ -151,10 +155,11 @@ class Formula(list):
 
     def _get_subformulae(self, prev_sf=None):
         sf = prev_sf or []
-        if not self.is_atomic:
-            for argument in self:
-                if type(argument) == self.__class__:
-                    sf = argument._get_subformulae(sf)
+        # Atomics have no arguments of the same class, so there is no need to check is_atomic first
+        cls = self.__class__
+        for argument in self:
+            if type(argument) == cls:
+                sf = argument._get_subformulae(sf)
         if self not in sf:
             sf.append(self)
         return sf
@@ -437,9 +442,10 @@ class Formula(list):
     def _is_molecular_instance_of(self, formula, language, subst_dict, return_subst_dict):
         # Check that the main symbol is the same, and that the arguments are instances
         if self.main_symbol == formula.main_symbol and len(self) == len(formula):
-            for argument_index in range(len(self.arguments(language.quantifiers))):
-                self_argument = self.arguments(language.quantifiers)[argument_index]
-                formula_argument = formula.arguments(language.quantifiers)[argument_index]
+            # Get the arguments once, not once per argument (this is called very often, e.g. when matching rules)
+            formula_arguments = formula.arguments(language.quantifiers)
+            for argument_index, self_argument in enumerate(self.arguments(language.quantifiers)):
+                formula_argument = formula_arguments[argument_index]
                 result = self_argument.is_instance_of(formula_argument, language, subst_dict, return_subst_dict=True)
                 # The argument is not instance of the formula schema's argument
                 if not result[0]:
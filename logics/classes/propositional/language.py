@@ -130,25 +130,30 @@ class Language:
         return True, ''
 
     def _is_molecular_well_formed(self, formula, return_error):
-        if formula.main_symbol not in self.constants():
+        # Only called by is_well_formed for molecular formulae, so the main symbol is the first element
+        main_symbol = formula[0]
+        if main_symbol not in self.constant_arity_dict:
             if not return_error:
                 return False
             return False, f'{formula} is not well-formed: ' \
                           f'First member of the list is not a logical constant of the language'
 
-        arity = self.arity(formula.main_symbol)
-        if len(formula.arguments()) != arity:
+        arguments = formula.arguments()
+        if len(arguments) != self.arity(main_symbol):
             if not return_error:
                 return False
             return False, f'{formula} is not well-formed: ' \
                           f'Number of arguments does not coincide with the arity of the logical constant'
 
-        for argument in formula.arguments():
+        for argument in arguments:
             if not isinstance(argument, formula.__class__):
                 if not return_error:
                     return False
                 return False, f'{formula} is not well-formed: Argument {argument} is not a formula'
-            if not self.is_well_formed(argument, return_error):
+            argument_well_formed = self.is_well_formed(argument, return_error)
+            if return_error:
+                argument_well_formed = argument_well_formed[0]  # The result is a (bool, str) tuple
+            if not argument_well_formed:
                 if not return_error:
                     return False
                 return False, f'{formula} is not well-formed: Argument {argument} is not a well-formed formula'
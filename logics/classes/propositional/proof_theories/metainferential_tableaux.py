@@ -31,6 +31,7 @@ class MetainferentialTableauxStandard:
     >>> standard.content[0].bar  # bar status is not inherited to content sub-standards
     False
     """
+    __slots__ = ('content', 'bar')
     standard_variables = ['W', 'X', 'Y', 'Z']  # These should not coincide with the formula metavariables of the lang
 
     def __init__(self, content, bar=False):
@@ -38,11 +39,9 @@ class MetainferentialTableauxStandard:
         self.bar = bar
 
         # At initialization, turn list elements into MetainferentialTableauxStandard
+        # (in a new list, so that the list given is not modified and callers need not copy it beforehand)
         if type(self.content) == list:
-            for index in range(len(self.content)):
-                argument = self.content[index]
-                argument = self.__class__(argument)
-                self.content[index] = argument
+            self.content = [self.__class__(argument) for argument in self.content]
 
     @property
     def level(self):
@@ -302,7 +301,8 @@ class MetainferentialTableauxSystem(TableauxSystem):
 
     @staticmethod
     def _fast_node_is_closed(node):
-        for node in node.path:
+        # Walk up the branch through the parents (the order does not matter)
+        while node is not None:
             # if it finds the empty set at the right, close
             if node.index.content == set():
                 return True
@@ -310,6 +310,7 @@ class MetainferentialTableauxSystem(TableauxSystem):
             if (type(node.content) == Inference and
                     len(node.content.premises) == 0 and len(node.content.conclusions) == 0 and not node.index.bar):
                 return True
+            node = node.parent
         return False
 
     def _rule_is_applicable_additional_conditions(self, node, subst_dict, rule_name):
@@ -682,6 +682,9 @@ class Sequent(list):
                 # Formula
                 else:
                     rule_formula_number += 1
+                    # Keep track of it even when there is no context before it, e.g. in rule [A, Γ] the Γ must
+                    # correspond to what is after the instance of A (not to the whole instance side)
+                    instance_corresponding_index = pattern_indexes[rule_formula_number]
 
                 # There is context to assign and we reach a formula or the end of the rule
                 if prev_rule_context and (rule_elem not in context_variables or last_element):
@@ -692,11 +695,6 @@ class Sequent(list):
                     # to prev_rule_context (i.e. [Γ, Δ]).
                     # Same in the end, we need to establish that Σ in the rule corresponds to [Δ, Σ] in the instance
 
-                    # Formula
-                    if rule_elem not in context_variables:
-                        instance_corresponding_index = pattern_indexes[rule_formula_number]
-                        # Will not be updated if last element and not formula
-
                     # First formula
                     if rule_elem not in context_variables and rule_formula_number == 0:
                         instance_context = self_side[0:instance_corresponding_index]
@@ -764,15 +762,23 @@ class Sequent(list):
         Does what the comment above says, e.g. if the rule's [Γ, Δ] corresponds to the instance's [Σ, A], returns an
         iterator that will yield {Γ:[Σ, A], Δ:[]}, {Γ:[Σ], Δ:[A]} and {Γ:[], Δ:[Σ, A]}
         """
-        combs = combinations_with_replacement(rule_context_list, len(instance_list))
-        # Combs will yield ('Γ', 'Γ'), ('Γ', 'Δ'), ('Δ', 'Δ') (to which of the rules vars the instances elems belong)
+        combs = combinations_with_replacement(range(len(rule_context_list)), len(instance_list))
+        # Combs will yield (0, 0), (0, 1), (1, 1) (to which of the rule's vars the instance's elems belong). They are
+        # positions and not the vars themselves because a var may be repeated, e.g. the Π in [Π, Π, Γ]
 
         def iterator(combs):
             for comb in combs:
-                yield_dict = {cv: [] for cv in rule_context_list}
+                segments = [[] for _ in rule_context_list]
                 for comb_index in range(len(comb)):
-                    yield_dict[comb[comb_index]].append(instance_list[comb_index])
-                yield yield_dict
+                    segments[comb[comb_index]].append(instance_list[comb_index])
+                yield_dict = dict()
+                for cv, segment in zip(rule_context_list, segments):
+                    # Every apparition of a repeated var must correspond to the same part of the instance
+                    if cv in yield_dict and yield_dict[cv] != segment:
+                        break
+                    yield_dict[cv] = segment
+                else:
+                    yield yield_dict
 
         return iterator(combs)
 
@@ -462,16 +462,18 @@ class TableauxSystem:
         Much faster (but less general) node_is_closed implementation.
         Checks whether A, i and ~A, i are present in the branch
         """
-        path = node.path
         # Basically, build a new list and add one node at a time, checking that its negation is not present
         # (or if it is a negated sentence, that the formula it negates is not present)
-        new_list = [(path[0].content, path[0].index)]
-        for node2 in path[1:]:
+        # The branch is walked upwards through the parents (the order does not matter, every pair gets checked)
+        new_list = []
+        node2 = node
+        while node2 is not None:
             if (Formula(['~', node2.content]), node2.index) in new_list:
                 return True
             if node2.content.main_symbol == '~' and (node2.content[1], node2.index) in new_list:
                 return True
             new_list.append((node2.content, node2.index))
+            node2 = node2.parent
         return False
 
     def tree_is_closed(self, node):
@@ -600,21 +602,18 @@ class TableauxSystem:
         (True, {'A': ['~', ['~', ['p']]], 'B': ['q']})
         True
         """
-        rule = self.rules[rule_name]
-        rule_prems = [n for n in PreOrderIter(rule) if n.justification is None]  # Rule premises
+        rule_prems = self._get_rule_premises(rule_name)
         # Check if the node is an instance of the last premise of the rule
         instance, subst_dict = node.is_instance_of(rule_prems[-1], self.language, return_subst_dict=True)
         if instance:
             # If it is, check that the rest of the premises of the rule (if there are any) are present
             remaining_prems = rule_prems[:-1]
             if remaining_prems:
-                # Walk up the path from the current node
-                first_elem = True
-                for node2 in node.iter_path_reverse():
-                    if first_elem:  # discard the first element (the current node)
-                        first_elem = False
-                        continue
-                    subst_dict2 = deepcopy(subst_dict)
+                # Walk up the path from the current node (excluding it)
+                node2 = node.parent
+                while node2 is not None:
+                    # A shallow copy suffices, is_instance_of only adds new keys (it does not modify the values)
+                    subst_dict2 = copy(subst_dict)
                     instance2, subst_dict2 = node2.is_instance_of(remaining_prems[-1], self.language, subst_dict2,
                                                                   return_subst_dict=True)
                     # We have to check here as well for the additional conditions before updating the subst_dict,
@@ -625,6 +624,7 @@ class TableauxSystem:
                         del remaining_prems[-1]
                         if not remaining_prems:
                             break
+                    node2 = node2.parent
             else:
                 # Check the additional conditions
                 # (e.g. inf0, inf1 rules in metainferential tableaux apply to inf, standard of the same level)
@@ -642,6 +642,21 @@ class TableauxSystem:
             return False
         return False, subst_dict
 
+    def _get_rule_premises(self, rule_name):
+        """Returns the premise nodes of a rule (those without justification), computing them only once per rule.
+
+        The returned list must not be modified by the caller
+        """
+        rule = self.rules[rule_name]
+        # Created lazily, so that subclasses that do not call TableauxSystem.__init__ also get it
+        rule_premises = self.__dict__.setdefault('_rule_premises', {})
+        cached = rule_premises.get(rule_name)
+        # The rule is also stored so that the cache is not stale if the rules dict is modified
+        if cached is None or cached[0] is not rule:
+            cached = (rule, [n for n in PreOrderIter(rule) if n.justification is None])
+            rule_premises[rule_name] = cached
+        return cached[1]
+
     def _rule_is_applicable_additional_conditions(self, node, subst_dict, rule_name):
         # Hook for more complex tableaux systems
         return True
@@ -780,7 +795,7 @@ class TableauxSystem:
                     subst_dict = result[1]
 
                     # Get the rule premises
-                    rule_prems = [n for n in PreOrderIter(self.rules[rule_name]) if n.justification is None]
+                    rule_prems = self._get_rule_premises(rule_name)
 
                     # See if the rule is correctly applied
                     # (rule_prems[-1] contains the last premise AND ITS SUBTREE)
@@ -1160,14 +1175,15 @@ class IndexedTableauxSystem(ManyValuedTableauxSystem, TableauxSystem):
     @staticmethod
     def _fast_node_is_closed(node):
         """Checks whether A, 1 and A, 0 are present in the branch"""
-        path = node.path
         # Basically, build a new list and add one node at a time, checking that its negation is not present
-        # (or if it is a negated sentence, that the formula it negates is not present)
-        new_list = [(path[0].content, path[0].index)]
-        for node2 in path[1:]:
+        # The branch is walked upwards through the parents (the order does not matter, every pair gets checked)
+        new_list = []
+        node2 = node
+        while node2 is not None:
             if (node2.content, 1 - node2.index) in new_list:
                 return True
             new_list.append((node2.content, node2.index))
+            node2 = node2.parent
         return False
 
 
@@ -1,4 +1,4 @@
-from copy import deepcopy
+from copy import copy
 
 from logics.classes.predicate import PredicateFormula
 from logics.classes.predicate.proof_theories import (
@@ -11,7 +11,7 @@ from logics.instances.propositional.natural_deduction import classical_primitive
 from logics.utils.upgrade import upgrade_derivation
 
 
-first_order_primitive_rules = deepcopy(classical_primitive_rules)
+first_order_primitive_rules = copy(classical_primitive_rules)  # upgrade_derivation returns new objects
 
 # Turn Formulae into PredicateFormulae, NaturalDeductionRule into PredicateNaturalDeductionRule
 for rule_name in first_order_primitive_rules:
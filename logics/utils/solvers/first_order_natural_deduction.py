@@ -1,4 +1,4 @@
-from copy import copy, deepcopy
+from copy import copy
 
 from logics.instances.predicate.languages import natural_deduction_predicate_language as cl_language
 from logics.utils.solvers.natural_deduction import (
@@ -74,9 +74,9 @@ class FirstOrderNaturalDeductionSolver(NaturalDeductionSolver):
 # ----------------------------------------------------------------------------
 # New simplification rules and their hardcoded derivations
 
-first_order_simplification_rules = deepcopy(standard_simplification_rules)
-first_order_derived_rules_derivations = deepcopy(standard_derived_rules_derivations)
-# We need to turn Formula into PredicateFormula for this solver
+# We need to turn Formula into PredicateFormula for this solver (the upgrade returns new objects, so no need to deepcopy)
+first_order_simplification_rules = copy(standard_simplification_rules)
+first_order_derived_rules_derivations = copy(standard_derived_rules_derivations)
 for rule_name in first_order_simplification_rules:
     rule = first_order_simplification_rules[rule_name]
     first_order_simplification_rules[rule_name] = upgrade_inference(rule)
@@ -185,7 +185,7 @@ class ExistentialEliminationHeuristic(Heuristic):
         tried_existentials.append(existential_idx)  # Add it so that we don't try it again
         existential = derivation[existential_idx].content
 
-        deriv1 = deepcopy(derivation)
+        deriv1 = copy(derivation)
 
         # Get an arbitrary individual constant
         # Need to check that the constant is not in the consequent as well, so lets add it at the end and then remove it
@@ -211,15 +211,17 @@ class ExistentialEliminationHeuristic(Heuristic):
         # should not happen but just in case) and therefore it just returned. We need to repeat the goal to close it.
         goal_step = solver._get_step_of_formula(goal, deriv1, new_open_sups)
         if len(deriv1) == len(derivation)+1:
-            deriv1.append(NaturalDeductionStep(content=goal[2], justification='repetition',
+            deriv1.append(NaturalDeductionStep(content=goal, justification='repetition',
                                                on_steps=[goal_step],
-                                               open_suppositions=copy(new_open_sups)))
+                                               open_suppositions=new_open_sups))
+            # The conditional must be introduced from the repetition (inside the supposition), not the original goal
+            goal_step = len(deriv1) - 1
         # Now add the conditional and the existential elimination
         deriv1.append(NaturalDeductionStep(content=PredicateFormula(['→', supposition, goal]), justification="I→",
-                                           on_steps=[sup_step, goal_step], open_suppositions=copy(prev_open_sups)))
+                                           on_steps=[sup_step, goal_step], open_suppositions=prev_open_sups))
         deriv1.append(NaturalDeductionStep(content=goal, justification="E∃",
                                            on_steps=[existential_idx, len(deriv1)-1],
-                                           open_suppositions=copy(prev_open_sups)))
+                                           open_suppositions=prev_open_sups))
         return deriv1
 
 
@@ -228,19 +230,16 @@ existential_elim_heuristic = ExistentialEliminationHeuristic(language=cl_languag
 
 class ExistentialIntroductionHeuristic(Heuristic):
     rule_justification = 'I∃'
+    main_symbols = ('∃',)
 
     def __init__(self, language):
         self.language = language
 
-    def is_applicable(self, goal):
-        return goal.main_symbol == '∃'
-
     def _is_arbitrary_constant(self, ind_ct, formula_quantified, derivation):
         return True  # Here we don't care about this, just return true. Will be overloaded in the UnivIntroHeuristic
 
     def apply_heuristic(self, derivation, goal, solver, tried_existentials):
         # Basically, try to derive every possible substitution instance
-        deriv1 = deepcopy(derivation)
         prev_open_sups = solver._get_current_open_sups(derivation)
 
         # Try to solve for each disjunct separately
@@ -255,6 +254,7 @@ class ExistentialIntroductionHeuristic(Heuristic):
                     continue
                 subst_instance = goal[2].vsubstitute(free_vars[0], ind_ct)
 
+            deriv1 = copy(derivation)  # Each attempt starts from the original derivation (see the DisjunctionHeuristic)
             try:
                 deriv1 = solver._solve_derivation(derivation=deriv1, goal=subst_instance,
                                                   tried_existentials=tried_existentials)
@@ -263,7 +263,7 @@ class ExistentialIntroductionHeuristic(Heuristic):
                 step_num = solver._get_step_of_formula(subst_instance, deriv1, prev_open_sups)
                 deriv1.append(NaturalDeductionStep(content=goal, justification=self.rule_justification,
                                                    on_steps=[step_num],
-                                                   open_suppositions=copy(prev_open_sups)))
+                                                   open_suppositions=prev_open_sups))
                 return deriv1
             except SolverError:
                 if not free_vars:
@@ -278,9 +278,7 @@ existential_intro_heuristic = ExistentialIntroductionHeuristic(language=cl_langu
 
 class UniversalIntroductionHeuristic(ExistentialIntroductionHeuristic):
     rule_justification = 'I∀'
-
-    def is_applicable(self, goal):
-        return goal.main_symbol == '∀'
+    main_symbols = ('∀',)
 
     def _is_arbitrary_constant(self, ind_ct, formula_quantified, derivation):
         # Check that the ind ct is not in the formula quantified
@@ -1,4 +1,4 @@
-from copy import copy, deepcopy
+from copy import copy
 
 from logics.classes.propositional import Formula, Inference
 from logics.classes.propositional.proof_theories import Derivation, NaturalDeductionStep
@@ -101,6 +101,11 @@ class NaturalDeductionSolver:
     #
     # * Also has some sub-algorithms for cleaning the derivation afterwards (deleting unnecesary steps, replacing the
     #   applications of derived rules for derivations with only primitive rules, etc.)
+    #
+    # While solving, steps are never modified once they are in a derivation (and neither are their formulae or their
+    # open_suppositions lists, opening a supposition builds a new list). Thus, heuristics take shallow copies of the
+    # derivation before extending it, and steps within the same suppositions share a single open_suppositions list. The
+    # cleaning step rebuilds every step, so the derivation returned to the user does not share anything with these.
 
     exit_on_falsum = True  # For the _apply_simplification_rules, will stop blindly deriving if it finds falsum
     def __init__(self, language, simplification_rules, derived_rules_derivations, heuristics):
@@ -112,6 +117,29 @@ class NaturalDeductionSolver:
         self.derived_rules_derivations = derived_rules_derivations
         self.heuristics = heuristics
 
+    @property
+    def heuristics(self):
+        return self._heuristics
+
+    @heuristics.setter
+    def heuristics(self, heuristics):
+        self._heuristics = heuristics
+        # Dispatch table of {main_symbol: heuristics that may apply to a goal with that main symbol}, built lazily
+        self._heuristics_dispatch = dict()
+
+    def _get_heuristics(self, main_symbol):
+        """Returns the heuristics that may be applicable to a goal with the given main symbol, in their original order
+
+        Heuristics that declare their ``main_symbols`` are filtered here, so that their ``is_applicable`` need not be
+        called afterwards
+        """
+        try:
+            return self._heuristics_dispatch[main_symbol]
+        except KeyError:
+            heuristics = tuple(h for h in self._heuristics if h.main_symbols is None or main_symbol in h.main_symbols)
+            self._heuristics_dispatch[main_symbol] = heuristics
+            return heuristics
+
     def solve(self, inference):
         """Takes an Inference and returns a derivation for it
 
@@ -137,8 +165,8 @@ class NaturalDeductionSolver:
         # The goal is already present in the derivation (and not in a closed supposition), return it
         current_open_sups = self._get_current_open_sups(derivation)
         for step_idx in range(len(derivation)):
-            if not self._is_in_closed_supposition(derivation[step_idx].open_suppositions, current_open_sups) and \
-                    derivation[step_idx].content == goal:
+            if derivation[step_idx].content == goal and \
+                    not self._is_in_closed_supposition(derivation[step_idx].open_suppositions, current_open_sups):
                 return derivation
 
         # Apply simplification rules (elimination + a couple more, see below)
@@ -154,12 +182,13 @@ class NaturalDeductionSolver:
             tried_existentials = []
 
         # If it did not find the goal, apply heuristics (they might call this method recursively)
-        for heuristic in self.heuristics:
-            if heuristic.is_applicable(goal):
-                try:
-                    return heuristic.apply_heuristic(derivation, goal, self, tried_existentials)
-                except SolverError:
-                    pass
+        for heuristic in self._get_heuristics(goal.main_symbol):
+            if heuristic.main_symbols is None and not heuristic.is_applicable(goal):
+                continue
+            try:
+                return heuristic.apply_heuristic(derivation, goal, self, tried_existentials)
+            except SolverError:
+                pass
 
         # If you did not return thus far (goal should be ⊥), raise an exception
         else:
@@ -185,6 +214,10 @@ class NaturalDeductionSolver:
         # will be needed below to not repeat adding:
         formulas_list = [step.content for step in derivation if
                          not self._is_in_closed_supposition(step.open_suppositions, open_sups)]
+        falsum = Formula(['⊥'])
+        # The rule names grouped by the main symbol of the steps they may be applied to. A step can only be an instance
+        # of the first premise of a rule if they have the same main symbol, or if that premise is atomic (e.g. 'A')
+        rules_by_main_symbol = dict()
 
         while prev_len_derivation != len(derivation):  # When they are equal we have not added any new steps
             prev_len_derivation = len(derivation)
@@ -195,7 +228,14 @@ class NaturalDeductionSolver:
                 if self._is_in_closed_supposition(step.open_suppositions, open_sups):
                     continue
 
-                for rule_name in self.simplification_rules:
+                main_symbol = step.content.main_symbol
+                if main_symbol not in rules_by_main_symbol:
+                    rules_by_main_symbol[main_symbol] = [
+                        rule_name for rule_name, rule in self.simplification_rules.items()
+                        if rule.premises[0].main_symbol is None or rule.premises[0].main_symbol == main_symbol
+                    ]
+
+                for rule_name in rules_by_main_symbol[main_symbol]:
                     # Check that the rule has not been applied to this step before
                     if step_idx in applied_rules[rule_name]:
                         continue
@@ -244,10 +284,10 @@ class NaturalDeductionSolver:
                                     derivation.append(NaturalDeductionStep(content=formula_to_add,
                                                                            justification=rule_name,
                                                                            on_steps=rule_steps,
-                                                                           open_suppositions=copy(open_sups)))
+                                                                           open_suppositions=open_sups))
                                     if goal == formula_to_add:
                                         return derivation
-                                    if self.exit_on_falsum and formula_to_add == Formula(['⊥']):
+                                    if self.exit_on_falsum and formula_to_add == falsum:
                                         return derivation
 
                                     # Register that we applied this rule to this step, so that we don't repeat
@@ -328,68 +368,64 @@ class NaturalDeductionSolver:
             open_sups = copy(step.open_suppositions)
             on_steps_iterator = iter(step.on_steps)
 
-            derived_rule = False
-            for derived_rule_name in hardcoded_rules:
-                if step.justification == derived_rule_name:
-                    derived_rule = True
-                    derived_rule_derivation = hardcoded_rules[derived_rule_name]
-                    step_correspondence_dict = dict()
-                    new_jump_steps = 0  # How many you will jump by adding the derivation of this rule
-                    num_premises = 0
-
-                    # Look at the current step and check that it is an instance of the conclusion of the derivation
-                    instance, subst_dict = step.content.is_instance_of(derived_rule_derivation[-1].content,
-                                                                       self.language,
-                                                                       return_subst_dict=True)
-                    if not instance:
-                        raise SolverError(f"Formula {step.content} is not an instance of the derived rule's conclusion")
-
-                    # Go step by step in the derivation of the derived rule
-                    step2_index = -1
-                    for step2 in derived_rule_derivation:
-                        step2_index += 1
-
-                        # If the step is a premise in the derivation of the derived rule, it is because it must be
-                        # present before in the current derivation
-                        if step2.justification == 'premise':
-                            # Since the other algorithms build the on_steps in order, we know that the first on_step
-                            # will correspond to the first premise of the derived rule derivation, the second with the
-                            # second, and so on. Thus, we can do this with an iterator.
-                            prev_step_index = next(on_steps_iterator)
-                            prev_step_formula = derivation2[prev_step_index].content
-
-                            # Get the substitution dictionary (for later steps)
-                            is_instance_of_formula, subst_dict = prev_step_formula.is_instance_of(step2.content,
-                                                                                                  self.language,
-                                                                                                  subst_dict=subst_dict,
-                                                                                                  return_subst_dict=True)
-                            if not is_instance_of_formula:
-                                raise SolverError(f'Formula {prev_step_formula} not an instance of {step2.content}')
-
-                            # Update the step_correspondence dict
-                            step_correspondence_dict[step2_index] = prev_step_index
-                            num_premises += 1
-
-                        # If the step is not a premise, then it is a new step in the derivation and we need to add it
-                        else:
-                            # Get the new content
-                            new_formula = self._get_non_premise_replacement(step2.content, subst_dict, derivation2)
-
-                            step_correspondence_dict[step2_index] = len(derivation2)
-
-                            new_on_steps = [step_correspondence_dict[x] for x in step2.on_steps]
-                            new_open_sups = open_sups + [step_correspondence_dict[x] for x in step2.open_suppositions]
-
-                            derivation2.append(NaturalDeductionStep(content=new_formula,
-                                                                    justification=step2.justification,
-                                                                    on_steps=new_on_steps,
-                                                                    open_suppositions=new_open_sups))
-                            new_jump_steps += 1
-
-                    jump_steps2.append([beginning_step, new_jump_steps-1])  # -1 bc the derived step is still present
-                    break  # Do not keep looking at the rest of the derived rules
-
-            if not derived_rule:
+            # Derived rules are looked up by the justification of the step (hardcoded_rules is a dict)
+            derived_rule_derivation = hardcoded_rules.get(step.justification)
+            if derived_rule_derivation is not None:
+                step_correspondence_dict = dict()
+                new_jump_steps = 0  # How many you will jump by adding the derivation of this rule
+                num_premises = 0
+
+                # Look at the current step and check that it is an instance of the conclusion of the derivation
+                instance, subst_dict = step.content.is_instance_of(derived_rule_derivation[-1].content,
+                                                                   self.language,
+                                                                   return_subst_dict=True)
+                if not instance:
+                    raise SolverError(f"Formula {step.content} is not an instance of the derived rule's conclusion")
+
+                # Go step by step in the derivation of the derived rule
+                step2_index = -1
+                for step2 in derived_rule_derivation:
+                    step2_index += 1
+
+                    # If the step is a premise in the derivation of the derived rule, it is because it must be
+                    # present before in the current derivation
+                    if step2.justification == 'premise':
+                        # Since the other algorithms build the on_steps in order, we know that the first on_step
+                        # will correspond to the first premise of the derived rule derivation, the second with the
+                        # second, and so on. Thus, we can do this with an iterator.
+                        prev_step_index = next(on_steps_iterator)
+                        prev_step_formula = derivation2[prev_step_index].content
+
+                        # Get the substitution dictionary (for later steps)
+                        is_instance_of_formula, subst_dict = prev_step_formula.is_instance_of(step2.content,
+                                                                                              self.language,
+                                                                                              subst_dict=subst_dict,
+                                                                                              return_subst_dict=True)
+                        if not is_instance_of_formula:
+                            raise SolverError(f'Formula {prev_step_formula} not an instance of {step2.content}')
+
+                        # Update the step_correspondence dict
+                        step_correspondence_dict[step2_index] = prev_step_index
+                        num_premises += 1
+
+                    # If the step is not a premise, then it is a new step in the derivation and we need to add it
+                    else:
+                        # Get the new content
+                        new_formula = self._get_non_premise_replacement(step2.content, subst_dict, derivation2)
+
+                        step_correspondence_dict[step2_index] = len(derivation2)
+
+                        new_on_steps = [step_correspondence_dict[x] for x in step2.on_steps]
+                        new_open_sups = open_sups + [step_correspondence_dict[x] for x in step2.open_suppositions]
+
+                        derivation2.append(NaturalDeductionStep(content=new_formula,
+                                                                justification=step2.justification,
+                                                                on_steps=new_on_steps,
+                                                                open_suppositions=new_open_sups))
+                        new_jump_steps += 1
+
+                jump_steps2.append([beginning_step, new_jump_steps-1])  # -1 bc the derived step is still present
+            else:
                 derivation2.append(step)
 
         return derivation2
@@ -411,14 +447,14 @@ class NaturalDeductionSolver:
 
     @staticmethod
     def _is_in_closed_supposition(step_open_sups, current_open_sups):
-        return not set(step_open_sups).issubset(set(current_open_sups))
+        return not set(step_open_sups).issubset(current_open_sups)
 
     def _get_step_of_formula(self, formula, derivation, current_open_sups):
         # get the step number of a given formula, such that the formula is not in a closed supposition
+        # (the content is compared first since it is cheaper than the supposition check and fails far more often)
         for index in range(len(derivation)):
-            if self._is_in_closed_supposition(derivation[index].open_suppositions, current_open_sups):
-                continue
-            if derivation[index].content == formula:
+            if derivation[index].content == formula and \
+                    not self._is_in_closed_supposition(derivation[index].open_suppositions, current_open_sups):
                 return index
         return None
 
@@ -455,22 +491,32 @@ class Heuristic:
     To define your own heuristic, inherit from this class and override the `is_applicable` and `apply_heuristic`
     methods.
 
+    If the heuristic is applicable exactly when the goal has some main symbol/s (e.g. the conjunction heuristic), you
+    can instead set the class attribute `main_symbols` to a tuple of those symbols. The solver will then dispatch on
+    the main symbol of the goal and will not call `is_applicable`.
+
     Examples
     --------
     See the source code for examples on how to define heuristics.
     """
+    main_symbols = None
+
     def is_applicable(self, goal):
         """Determines whether the heuristic is applicable given the current goal.
 
         Takes the goal as parameter and should return a boolean.
         The other two parameters are basically for the existential heuristic in the predicate solver
         """
+        if self.main_symbols is not None:
+            return goal.main_symbol in self.main_symbols
         raise NotImplementedError()
 
     def apply_heuristic(self, derivation, goal, solver, tried_existentials):
         """Applies the heuristic.
 
         Takes the current deriation, goal, current open suppositions and solver, and returns a derivation.
+        Should not modify the steps already present in the derivation given (take a ``copy`` of the derivation and
+        append new steps to it instead).
         The parameter `jump_steps` is present because of how the conjunction heuristic works (see the source code for
         the conjunction heuristic for more on this)
         """
@@ -483,39 +529,40 @@ class ConjunctionHeuristic(Heuristic):
     for B; finally, apply conjunction introduction.
     """
 
-    def is_applicable(self, goal):
-        return goal.main_symbol == '∧'
+    main_symbols = ('∧',)
 
     def apply_heuristic(self, derivation, goal, solver, tried_existentials):
-        deriv1 = deepcopy(derivation)
+        first_conjunct, second_conjunct = goal[1], goal[2]
+        deriv1 = copy(derivation)
         # Solve the derivation of the first conjunct
-        deriv1 = solver._solve_derivation(derivation=deriv1, goal=goal[1])
+        deriv1 = solver._solve_derivation(derivation=deriv1, goal=first_conjunct)
         open_sups = solver._get_current_open_sups(derivation)
 
         # Save the step where the first conjunct is, for the introduction later
         # (the step may not be the last of deriv1 if the first conjunct was already present in the derivation)
-        first_conjunct_step = solver._get_step_of_formula(goal[1], deriv1, open_sups)
+        first_conjunct_step = solver._get_step_of_formula(first_conjunct, deriv1, open_sups)
 
         # If asked for a conjunction between the same two formulas, simply repeat the first conjunct
         # (more efficient, and otherwise p / p ∧ p would have on steps [1, 1] which is wrong)
-        if goal[1] == goal[2]:
-            deriv1.append(NaturalDeductionStep(content=goal[2], justification="repetition",
+        if first_conjunct == second_conjunct:
+            deriv1.append(NaturalDeductionStep(content=second_conjunct, justification="repetition",
                                                on_steps=[first_conjunct_step],
-                                               open_suppositions=copy(open_sups)))
+                                               open_suppositions=open_sups))
             deriv1.append(NaturalDeductionStep(content=goal, justification="I∧",
                                                    on_steps=[first_conjunct_step, len(deriv1) - 1],
-                                                   open_suppositions=copy(open_sups)))
+                                                   open_suppositions=open_sups))
             return deriv1
 
         # Otherwise, if the second conjunct is different from the first, solve the derivation for the second conjunct
-        deriv1 = solver._solve_derivation(derivation=deriv1, goal=goal[2], tried_existentials=tried_existentials)
+        deriv1 = solver._solve_derivation(derivation=deriv1, goal=second_conjunct,
+                                          tried_existentials=tried_existentials)
 
         # Save the step where the second conjunct is, for the introduction later
-        second_conjunct_step = solver._get_step_of_formula(goal[2], deriv1, open_sups)
+        second_conjunct_step = solver._get_step_of_formula(second_conjunct, deriv1, open_sups)
 
         deriv1.append(NaturalDeductionStep(content=goal, justification="I∧",
                                            on_steps=[first_conjunct_step, second_conjunct_step],
-                                           open_suppositions=copy(open_sups)))
+                                           open_suppositions=open_sups))
         return deriv1
 
 
@@ -523,33 +570,34 @@ conjunction_heuristic = ConjunctionHeuristic()
 
 
 class ConditionalHeuristic(Heuristic):
-    def is_applicable(self, goal):
-        return goal.main_symbol == '→'
+    main_symbols = ('→',)
 
     def apply_heuristic(self, derivation, goal, solver, tried_existentials):
-        deriv1 = deepcopy(derivation)
+        antecedent, consequent = goal[1], goal[2]
+        deriv1 = copy(derivation)
 
         # Add the antecedent as a supposition
         prev_open_sups = solver._get_current_open_sups(derivation)
         new_open_sups = prev_open_sups + [len(derivation)]
-        deriv1.append(NaturalDeductionStep(content=goal[1], justification='supposition',
-                                           on_steps=[], open_suppositions=copy(new_open_sups)))
+        deriv1.append(NaturalDeductionStep(content=antecedent, justification='supposition',
+                                           on_steps=[], open_suppositions=new_open_sups))
 
         # Solve for the consequent
-        deriv1 = solver._solve_derivation(derivation=deriv1, goal=goal[2], tried_existentials=tried_existentials)
+        deriv1 = solver._solve_derivation(derivation=deriv1, goal=consequent, tried_existentials=tried_existentials)
 
         # If deriv1 has one more step (the supposition), it is because the derivation already contained
         # the consequent, and therefore it just returned. We need to repeat the consequent to close it.
         if len(deriv1) == len(derivation)+1:
-            consequent_step = solver._get_step_of_formula(goal[2], deriv1, new_open_sups)  # new to check the antecedent
-            deriv1.append(NaturalDeductionStep(content=goal[2], justification='repetition',
+            # new_open_sups to also check the antecedent
+            consequent_step = solver._get_step_of_formula(consequent, deriv1, new_open_sups)
+            deriv1.append(NaturalDeductionStep(content=consequent, justification='repetition',
                                                on_steps=[consequent_step],
-                                               open_suppositions=copy(new_open_sups)))
+                                               open_suppositions=new_open_sups))
 
         deriv1.append(NaturalDeductionStep(content=goal, justification="I→",
                                            on_steps=[len(derivation),  # where we introduced the supposition
                                                      len(deriv1)-1],   # last step of the new derivation
-                                           open_suppositions=copy(prev_open_sups)))
+                                           open_suppositions=prev_open_sups))
         return deriv1
 
 
@@ -557,15 +605,16 @@ conditional_heuristic = ConditionalHeuristic()
 
 
 class DisjunctionHeuristic(Heuristic):
-    def is_applicable(self, goal):
-        return goal.main_symbol == '∨'
+    main_symbols = ('∨',)
 
     def apply_heuristic(self, derivation, goal, solver, tried_existentials):
-        deriv1 = deepcopy(derivation)
         prev_open_sups = solver._get_current_open_sups(derivation)
 
         # Try to solve for each disjunct separately
         for disjunct in (1, 2):
+            # A failed attempt may have left steps in its copy, so each disjunct starts again from the original
+            # derivation (a shallow copy is enough for this, see the comments in NaturalDeductionSolver)
+            deriv1 = copy(derivation)
             try:
                 deriv1 = solver._solve_derivation(derivation=deriv1, goal=goal[disjunct],
                                                   tried_existentials=tried_existentials)
@@ -574,7 +623,7 @@ class DisjunctionHeuristic(Heuristic):
                 step_num = solver._get_step_of_formula(goal[disjunct], deriv1, prev_open_sups)
                 deriv1.append(NaturalDeductionStep(content=goal, justification=f'I∨{disjunct}',
                                                        on_steps=[step_num],
-                                                       open_suppositions=copy(prev_open_sups)))
+                                                       open_suppositions=prev_open_sups))
                 return deriv1
             except SolverError as e:
                 if disjunct == 1:
@@ -589,12 +638,13 @@ disjunction_heuristic = DisjunctionHeuristic()
 class ReductioHeuristic(Heuristic):
     def __init__(self, formula_class=Formula):
         self.formula_class = formula_class
+        self.falsum = formula_class(['⊥'])
 
     def is_applicable(self, goal):
-        return goal != self.formula_class(['⊥'])
+        return goal != self.falsum
 
     def apply_heuristic(self, derivation, goal, solver, tried_existentials):
-        deriv1 = deepcopy(derivation)
+        deriv1 = copy(derivation)
 
         # Add the negation of the goal as a supposition (if the goal already is a negation, remove that negation)
         prev_open_sups = solver._get_current_open_sups(derivation)
@@ -603,12 +653,12 @@ class ReductioHeuristic(Heuristic):
             goal_is_negation = False
             supposition = self.formula_class(['~', goal])
             deriv1.append(NaturalDeductionStep(content=supposition, justification='supposition',
-                                               on_steps=[], open_suppositions=copy(new_open_sups)))
+                                               on_steps=[], open_suppositions=new_open_sups))
         else:
             goal_is_negation = True
             supposition = goal[1]
             deriv1.append(NaturalDeductionStep(content=supposition, justification='supposition',
-                                               on_steps=[], open_suppositions=copy(new_open_sups)))
+                                               on_steps=[], open_suppositions=new_open_sups))
 
         # Solve for falsum
         new_goal = self.formula_class(['⊥'])
@@ -620,7 +670,7 @@ class ReductioHeuristic(Heuristic):
             falsum_step = solver._get_step_of_formula(new_goal, deriv1, prev_open_sups)
             deriv1.append(NaturalDeductionStep(content=self.formula_class(['⊥']), justification='repetition',
                                                on_steps=[falsum_step],
-                                               open_suppositions=copy(new_open_sups)))
+                                               open_suppositions=new_open_sups))
 
         if not goal_is_negation:
             # If the goal was not a negation, we supposed ~goal, so have to conclude ~~goal and then apply DN
@@ -628,16 +678,16 @@ class ReductioHeuristic(Heuristic):
                                                justification="I~",
                                                on_steps=[len(derivation),  # where we introduced the supposition
                                                          len(deriv1)-1],
-                                               open_suppositions=copy(prev_open_sups)))
+                                               open_suppositions=prev_open_sups))
             deriv1.append(NaturalDeductionStep(content=goal, justification="~~",
                                                on_steps=[len(deriv1)- 1],
-                                               open_suppositions=copy(prev_open_sups)))
+                                               open_suppositions=prev_open_sups))
         else:
             # If the goal was ~A, we supposed A, and we just need to conclude ~A
             deriv1.append(NaturalDeductionStep(content=goal, justification="I~",
                                                on_steps=[len(derivation),  # where we introduced the supposition
                                                          len(deriv1) - 1],
-                                               open_suppositions=copy(prev_open_sups)))
+                                               open_suppositions=prev_open_sups))
 
         return deriv1
 
@@ -648,18 +698,19 @@ reductio_heuristic = ReductioHeuristic()
 class EFSQHeuristic(Heuristic):
     def __init__(self, formula_class=Formula):
         self.formula_class = formula_class
+        self.falsum = formula_class(['⊥'])
 
     def is_applicable(self, goal):
         return True
 
     def apply_heuristic(self, derivation, goal, solver, tried_existentials):
         open_sups = solver._get_current_open_sups(derivation)
-        falsum_idx = solver._get_step_of_formula(self.formula_class(['⊥']), derivation, open_sups)
+        falsum_idx = solver._get_step_of_formula(self.falsum, derivation, open_sups)
         if falsum_idx is not None:
-            deriv1 = deepcopy(derivation)
+            deriv1 = copy(derivation)
             deriv1.append(NaturalDeductionStep(content=goal, justification='EFSQ',
                                                on_steps=[falsum_idx],
-                                               open_suppositions=copy(open_sups)))
+                                               open_suppositions=open_sups))
             return deriv1
         raise SolverError()
 
@@ -1046,10 +1097,11 @@ class AltNaturalDeductionSolver(NaturalDeductionSolver):
                 # Change the content, put the negated formula in second place
                 formula1 = derivation[step.on_steps[0]].content
                 formula2 = derivation[step.on_steps[1]].content
-                if formula2 == Formula(['~', formula1]):
+                # Compare structurally instead of building the negation of each formula
+                if formula2.main_symbol == '~' and formula2[1] == formula1:
                     # The second formula is the negated one, no need to change the on_steps
                     step.content = Formula(['∧', formula1, formula2])
-                elif formula1 == Formula(['~', formula2]):
+                elif formula1.main_symbol == '~' and formula1[1] == formula2:
                     # The first formula is the negated one, invert the on_steps
                     step.content = Formula(['∧', formula2, formula1])
                     step.on_steps = [step.on_steps[1], step.on_steps[0]]
@@ -1,9 +1,15 @@
-from copy import deepcopy
-
+from logics.classes.propositional import Formula
 from logics.classes.propositional.proof_theories.sequents import Sequent, SequentNode
 from logics.classes.exceptions import SolverError
 
 
+def _freeze(element):
+    """Returns a hashable version of a sequent or formula (nested lists become nested tuples), for use as a dict key"""
+    if isinstance(element, list):
+        return tuple(_freeze(x) for x in element)
+    return element
+
+
 class SequentReducer:
     """Solver for sequent calculi
 
@@ -76,19 +82,29 @@ class SequentReducer:
         """
         if premises is None:
             premises = list()
-        reduction, failed_reductions = self._standard_reduce(sequent, sequent_calculus, premises, max_depth)
+        reduction, failed_reductions = self._standard_reduce(sequent, sequent_calculus, premises, max_depth,
+                                                             reduced_sequents=dict(),
+                                                             rule_main_symbols=self._get_rule_main_symbols(
+                                                                 sequent_calculus))
         if reduction is None:
             raise SolverError(f'Could not find reduction for {sequent}')
 
         return reduction
 
     def _standard_reduce(self, sequent, sequent_calculus, premises, max_depth,
-                         present_sequents=None, failed_reductions=None):
+                         present_sequents=None, failed_reductions=None, reduced_sequents=None,
+                         rule_main_symbols=None):
         """
         Simply checks for each rule in sequent_calculus.solver_rule_order (should be a list of strings (rule names)
         is applicable to sequent, and then instantiates and reduces the premises.
         For better efficiency, if it fails a reduction saves the result and does not try it again later on.
+        Both the failed reductions and the sequents present in the branch are sets of frozen sequents (see _freeze
+        above), so that checking for membership is a hash lookup. present_sequents is shared by every call: a sequent
+        is added to it while its premises are being reduced, and removed before returning.
+        Likewise, if it succeeds it saves the reduction in reduced_sequents (a dict, keyed by the frozen sequent) and
+        reuses a copy of it if the same sequent needs to be reduced again (in this same call to reduce).
         Will also avoid repeating a sequent in a branch
+        rule_main_symbols (see _get_rule_main_symbols below) is used to discard rules without calling is_instance_of
 
         Will return the first complete reduction it finds. If it finds none, will return (None, failed_reductions)
         """
@@ -97,9 +113,19 @@ class SequentReducer:
         if max_depth == 0:
             return None, failed_reductions
         if failed_reductions is None:
-            failed_reductions = list()
+            failed_reductions = set()
         if present_sequents is None:
-            present_sequents = list()
+            present_sequents = set()
+        if reduced_sequents is None:
+            reduced_sequents = dict()
+        if rule_main_symbols is None:
+            rule_main_symbols = self._get_rule_main_symbols(sequent_calculus)
+
+        # If the sequent was already reduced, reuse that reduction (if it does not make the tree exceed the max depth)
+        sequent_key = _freeze(sequent)
+        previous_reduction = reduced_sequents.get(sequent_key)
+        if previous_reduction is not None and previous_reduction.height < max_depth:
+            return self._copy_tree(previous_reduction), failed_reductions
 
         # First check if the sequent given is a premise or an axiom
         for premise in premises:
@@ -115,27 +141,36 @@ class SequentReducer:
             if weakening_reduction is not None:
                 return weakening_reduction, failed_reductions
 
+        # Branch and bound: the premises of any rule would be reduced with max_depth 0, which always fails
+        if max_depth == 1:
+            return None, failed_reductions
+
         # If not an axiom, check if the sequent is an instance of the conclusion of every rule
+        present_sequents.add(sequent_key)
+        sequent_main_symbols = [{elem.main_symbol for elem in side if isinstance(elem, Formula)} for side in sequent]
         for rule_name in sequent_calculus.solver_rule_order:
+            # Cheap check: every main symbol required by the rule conclusion must be present in the respective side
+            required_main_symbols = rule_main_symbols[rule_name]
+            if len(required_main_symbols) == len(sequent_main_symbols) and \
+                    not all(map(set.issubset, required_main_symbols, sequent_main_symbols)):
+                continue
             rule = sequent_calculus.rules[rule_name]
             instance, possible_subst_dicts = sequent.is_instance_of(rule.content, sequent_calculus.language,
                                                                     return_subst_dicts=True)
             if instance:
                 # print('\t', rule_name, 'applicable to', sequent)
-                new_node = SequentNode(content=sequent, justification=rule_name)
-
-                # Get all the possible premise instantiations. Do this first because:
-                # - some possible dicts may yield different premise instantiations, but others may yield the same
-                # - in the latter case, we do not want to try the same list of premises more than once
-                possible_premise_instantiations = list()
+                # Get the premises of the rule, instantiated with the first substitution dict whose premises are not
+                # already in the path, did not fail a previous reduction and respect the max apparitions of a formula
+                instantiated_premises = None
                 for subst_dict in possible_subst_dicts:
                     exit_dict = False
                     rule_premises = list()
                     for rule_premise in rule.children:
                         instantiated_premise = rule_premise.content.instantiate(sequent_calculus.language, subst_dict)
+                        premise_key = _freeze(instantiated_premise)
                         # Check if the premise is already in the path, or if a previous attempt of reduction failed
-                        if instantiated_premise == sequent or instantiated_premise in present_sequents or \
-                                instantiated_premise in failed_reductions:
+                        if premise_key == sequent_key or premise_key in present_sequents or \
+                                premise_key in failed_reductions:
                             exit_dict = True
                             break
                         # Check for the maximum number of apparitions of a formula
@@ -143,48 +178,86 @@ class SequentReducer:
                             exit_dict = True
                             break
                         rule_premises.append(instantiated_premise)
-                    if not exit_dict and rule_premises not in possible_premise_instantiations:
-                        possible_premise_instantiations.append(rule_premises)
+                    if not exit_dict:
+                        instantiated_premises = rule_premises
+                        break
+                if instantiated_premises is None:
+                    continue
 
-                # Now, for each set of possible premises of the rule, attempt a reduction
+                # Now attempt a reduction of each premise. Exclusive cut: if one of them fails, the rule is not tried
+                # again with the remaining substitution dicts, we move on to the next rule
+                new_node = SequentNode(content=sequent, justification=rule_name)
                 correct_reduction = True
-                # print('\t', 'instantiated premises', possible_premise_instantiations)
-                for instantiated_premises in possible_premise_instantiations:
-                    for instantiated_premise in instantiated_premises:
-                        # print('\t\t', 'attempting reduction of', instantiated_premise)
-                        if instantiated_premise not in failed_reductions:
-                            premise_reduction, failed_reductions = self._standard_reduce(instantiated_premise,
-                                                                          sequent_calculus,
-                                                                          premises=premises,
-                                                                          max_depth=max_depth-1,
-                                                                          present_sequents=present_sequents + [sequent],
-                                                                          failed_reductions=failed_reductions)
-                            # The reduction failed (the method returned None)
-                            if premise_reduction is None:
-                                correct_reduction = False
-                                if instantiated_premise not in failed_reductions:
-                                    failed_reductions.append(instantiated_premise)
-                                break
-                            # Premise reduction is a node (which may contain children)
-                            premise_reduction.parent = new_node
-
-                    if correct_reduction:
-                        return new_node, failed_reductions
+                # print('\t', 'instantiated premises', instantiated_premises)
+                for instantiated_premise in instantiated_premises:
+                    # print('\t\t', 'attempting reduction of', instantiated_premise)
+                    premise_key = _freeze(instantiated_premise)
+                    # The premise may have failed while reducing the previous ones
+                    if premise_key in failed_reductions:
+                        correct_reduction = False
+                        break
+                    premise_reduction, failed_reductions = self._standard_reduce(instantiated_premise,
+                                                                  sequent_calculus,
+                                                                  premises=premises,
+                                                                  max_depth=max_depth-1,
+                                                                  present_sequents=present_sequents,
+                                                                  failed_reductions=failed_reductions,
+                                                                  reduced_sequents=reduced_sequents,
+                                                                  rule_main_symbols=rule_main_symbols)
+                    # The reduction failed (the method returned None)
+                    if premise_reduction is None:
+                        correct_reduction = False
+                        failed_reductions.add(premise_key)
+                        break
+                    # Premise reduction is a node (which may contain children)
+                    premise_reduction.parent = new_node
+
+                if correct_reduction:
+                    reduced_sequents[sequent_key] = new_node
+                    present_sequents.discard(sequent_key)
+                    return new_node, failed_reductions
 
         # If neither of the above, the sequent cannot be reduced, raise SolverError
         # print('\t\t', 'exit reduction of', sequent)
+        present_sequents.discard(sequent_key)
         return None, failed_reductions
 
+    @staticmethod
+    def _get_rule_main_symbols(sequent_calculus):
+        """
+        For each rule in the solver rule order, returns a list with the set of main symbols of the molecular formulae
+        in each side of its conclusion. A sequent can only be an instance of the conclusion if each of its sides
+        contains formulae with those main symbols.
+        """
+        rule_main_symbols = dict()
+        for rule_name in sequent_calculus.solver_rule_order:
+            conclusion = sequent_calculus.rules[rule_name].content
+            rule_main_symbols[rule_name] = [{elem.main_symbol for elem in side if
+                                             isinstance(elem, Formula) and not elem.is_atomic} for side in conclusion]
+        return rule_main_symbols
+
+    def _copy_tree(self, node):
+        """Returns a copy of the reduction tree below node (shares the sequents, which are not modified by the reducer)"""
+        return SequentNode(content=node.content, justification=node.justification,
+                           children=[self._copy_tree(child) for child in node.children])
+
+    @staticmethod
+    def _copy_sides(sequent):
+        """Copies the sides of a sequent (so that they can be weakened) but not the formulae in them"""
+        return Sequent([list(side) for side in sequent])
+
     def _check_max_apparitions(self, sequent):
         """Checks that no formula appears more than max_apparitions_per_side in a sequent"""
-        if self.max_apparitions_per_side:
+        max_apparitions = self.max_apparitions_per_side
+        if max_apparitions:
             for side in sequent:
+                # A side with no more elements than the maximum cannot exceed it
+                if len(side) <= max_apparitions:
+                    continue
+                # NO - Check for context variables as well, since we are allowing to contract them in LKminEA
+                side_count = side.count
                 for elem in side:
-                    # NO - Check for context variables as well, since we are allowing to contract them in LKminEA
-                    # if elem not in sequent_calculus.language.context_variables and \
-                    #         side.count(elem) > self.max_apparitions_per_side:
-                    #     return False
-                    if side.count(elem) > self.max_apparitions_per_side:
+                    if side_count(elem) > max_apparitions:
                         return False
         return True
 
@@ -200,6 +273,8 @@ class SequentReducer:
                     if premise_elem not in sequent[side_index]:
                         premise_present = False
                         break
+                if not premise_present:
+                    break
             if premise_present:
                 initial_sequent = premise
                 new_node = SequentNode(content=initial_sequent, justification='premise')
@@ -236,14 +311,14 @@ class SequentReducer:
 
         # We need to weaken in order, so first let's do backwards from index to 0
         for index_left in range(formula_index-1, -1, -1):
-            new_sequent = deepcopy(new_node.content)
+            new_sequent = self._copy_sides(new_node.content)
             new_sequent[side_number].insert(0, target_side[index_left])
             new_node = SequentNode(content=new_sequent, justification=self.weakening_rule_names[side_number],
                                    children=[new_node])
 
         # Now walk forward from index
         for index_right in range(formula_index + 1, len(target_side)):
-            new_sequent = deepcopy(new_node.content)
+            new_sequent = self._copy_sides(new_node.content)
             new_sequent[side_number].append(target_side[index_right])
             new_node = SequentNode(content=new_sequent, justification=self.weakening_rule_names[side_number],
                                    children=[new_node])
@@ -271,7 +346,7 @@ class SequentReducer:
             # target element does not coincide with the premise element to look for,
             # weaken the current content to add it
             if premise_elem is None or target_elem != premise_elem:
-                new_sequent = deepcopy(new_node.content)
+                new_sequent = self._copy_sides(new_node.content)
                 new_sequent[side_number].insert(target_position, target_elem)
                 new_node = SequentNode(content=new_sequent, justification=self.weakening_rule_names[side_number],
                                        children=[new_node])
@@ -1,6 +1,5 @@
-from copy import deepcopy
-
-from anytree import PreOrderIter, LevelOrderIter
+from collections import deque
+from copy import copy
 
 from logics.classes.propositional import Formula, Inference
 from logics.classes.exceptions import SolverError
@@ -80,54 +79,159 @@ class TableauxSolver:
         """
         tableaux = self._begin_tableaux(inference, beggining_index)
 
+        # Depth of every node in the tableaux (anytree's `depth` walks up to the root every time it is asked for)
+        depths = dict()
+        leaves = list()
+        self._walk_subtree(tableaux, 0, depths, leaves)
+        # Open leaves of the tableaux, in the order given by anytree's `leaves`. Since nodes are only ever added below
+        # leaves, the path of a node never changes, so closure only needs to be checked for the newly added leaves
+        open_leaves = [leaf for leaf in leaves if not tableaux_system.node_is_closed(leaf)]
+        if not open_leaves:
+            return tableaux
+
+        # Cache for the results of rule_is_applicable (see _rule_is_applicable below)
+        single_premise_rules = {rule_name for rule_name in tableaux_system.rules if
+                                len(tableaux_system._get_rule_premises(rule_name)) == 1}
+        applicability_cache = dict()
+        # Rules that can be applied to nodes with each main symbol, in their original order (see _get_rule_names)
+        rule_main_symbols = self._get_rule_main_symbols(tableaux_system)
+        rule_names_by_main_symbol = dict()
+        # Bound once here, since they are used in the innermost loops below
+        rules = tableaux_system.rules
+        node_is_closed = tableaux_system.node_is_closed
+        is_descendant = self._is_descendant
+
         # For each node of the tableaux (including the ones we add dynamically)
-        for node in LevelOrderIter(tableaux):  # LevelOrder so that it does not get stuck on a branch
+        worklist = deque([tableaux])  # FIFO, so that it goes in level order and does not get stuck on a branch
+        while worklist:
+            node = worklist.popleft()
             # We go rule by rule seeing if it can be applied
-            for rule_name in tableaux_system.rules:
-                result = tableaux_system.rule_is_applicable(node, rule_name, return_subst_dict=True)
+            for rule_name in self._get_rule_names(node, rule_main_symbols, rule_names_by_main_symbol):
+                result = self._rule_is_applicable(tableaux_system, node, rule_name, single_premise_rules,
+                                                  applicability_cache)
                 applicable = result[0]
                 if applicable:
                     # Get the rule and substitute the metavariables for formulae in it
                     subst_dict = result[1]
-                    rule = tableaux_system.rules[rule_name]
+                    rule = rules[rule_name]
                     rule_application = self.apply_rule(tableaux_system, rule_name, rule, subst_dict)
 
                     # Now get everything that isn't a premise in the tree obtained and add it to every open branch
+                    # below the current node
                     rule_application_last_prem = self._get_last_premise_node(rule_application)
-                    counter = 1
-                    for leaf in node.leaves:
-                        if not tableaux_system.node_is_closed(leaf):
-                            # _add_children_to_leaf may change the root, so if this is not the last leaf,
-                            # we need to copy the rule last prem subtree
-                            root = rule_application_last_prem
-                            if counter != len(node.leaves):
-                                root = deepcopy(root)
-                            counter += 1
-
-                            self._add_children_to_leaf(root, leaf)
-
-                    # After applying the rule we may have new leaves
-                    some_leaf_open = False
-                    for leaf in tableaux.leaves:
-                        if max_depth is not None and leaf.depth == max_depth:
-                            raise SolverError('Could not solve the tree. Maximum depth exceeded')
-
-                        if not tableaux_system.node_is_closed(leaf):
-                            some_leaf_open = True
-                    if not some_leaf_open:
+                    node_open_leaves = [leaf for leaf in open_leaves if is_descendant(leaf, node, depths)]
+                    for leaf_number, leaf in enumerate(node_open_leaves):
+                        # _add_children_to_leaf may change the root, so if this is not the last leaf,
+                        # we need to copy the rule last prem subtree (only the subtree, not the nodes above it)
+                        root = rule_application_last_prem
+                        if leaf_number != len(node_open_leaves) - 1:
+                            root = self._copy_subtree(root)
+                        self._add_children_to_leaf(root, leaf)
+
+                        # Replace the extended leaf with its new open leaves
+                        new_leaves = list()
+                        for child in leaf.children:
+                            self._walk_subtree(child, depths[leaf] + 1, depths, new_leaves)
+                        if not new_leaves:
+                            continue
+                        for new_leaf in new_leaves:
+                            if max_depth is not None and depths[new_leaf] == max_depth:
+                                raise SolverError('Could not solve the tree. Maximum depth exceeded')
+                        leaf_position = open_leaves.index(leaf)
+                        open_leaves[leaf_position:leaf_position + 1] = [
+                            new_leaf for new_leaf in new_leaves if not node_is_closed(new_leaf)
+                        ]
+
+                    if not open_leaves:
                         return tableaux
 
+            worklist.extend(node.children)
+
         return tableaux
 
-    def _get_last_premise_node(self, rule_application):
-        last_prem = None
-        for node in PreOrderIter(rule_application):  # This assumes that the rule premises do not branch
-            if node.justification is None:
-                last_prem = node
+    @staticmethod
+    def _rule_is_applicable(tableaux_system, node, rule_name, single_premise_rules, applicability_cache):
+        """
+        Calls tableaux_system.rule_is_applicable, memoizing the result for rules with a single premise.
+        Whether those apply only depends on the node itself (its content, index and justification), so the result is
+        keyed by the identity of these. Nodes in copied subtrees share their content and index (see _copy_subtree),
+        so the same rule is not matched again against every copy.
+
+        Assumes that _rule_is_applicable_additional_conditions only looks at the node, not at the rest of the branch
+        """
+        if rule_name not in single_premise_rules:
+            return tableaux_system.rule_is_applicable(node, rule_name, return_subst_dict=True)
+        key = (rule_name, id(node.content), id(node.index), node.justification)
+        result = applicability_cache.get(key)
+        if result is None:
+            result = tableaux_system.rule_is_applicable(node, rule_name, return_subst_dict=True)
+            applicability_cache[key] = result
+        return result
+
+    @staticmethod
+    def _get_rule_main_symbols(tableaux_system):
+        """
+        For each rule, returns the main symbol of the content of its last premise. A node can only be an instance of
+        it if its content has that same main symbol. Rules whose last premise is atomic (e.g. a metavariable) or not a
+        formula (e.g. an inference) get None, meaning that they have to be tried on every node.
+        """
+        rule_main_symbols = dict()
+        for rule_name in tableaux_system.rules:
+            last_prem_content = tableaux_system._get_rule_premises(rule_name)[-1].content
+            if isinstance(last_prem_content, Formula) and not last_prem_content.is_atomic:
+                rule_main_symbols[rule_name] = last_prem_content.main_symbol
             else:
-                break
+                rule_main_symbols[rule_name] = None
+        return rule_main_symbols
+
+    @staticmethod
+    def _get_rule_names(node, rule_main_symbols, rule_names_by_main_symbol):
+        """Returns the names of the rules that may be applicable to node (in the order of the system's rules),
+        memoizing the result for each main symbol in rule_names_by_main_symbol"""
+        main_symbol = node.content.main_symbol if isinstance(node.content, Formula) else None
+        rule_names = rule_names_by_main_symbol.get(main_symbol)
+        if rule_names is None:
+            rule_names = [rule_name for rule_name, rule_main_symbol in rule_main_symbols.items() if
+                          rule_main_symbol is None or rule_main_symbol == main_symbol]
+            rule_names_by_main_symbol[main_symbol] = rule_names
+        return rule_names
+
+    @staticmethod
+    def _is_descendant(leaf, node, depths):
+        """Returns True if `leaf` is `node` or one of its descendants (`depths` maps every node to its depth)"""
+        for _ in range(depths[leaf] - depths[node]):
+            leaf = leaf.parent
+        return leaf is node
+
+    def _walk_subtree(self, node, depth, depths, leaves):
+        """
+        Records the depth of a node and its descendants in `depths` (given the depth of the node), and appends the
+        leaves below it to `leaves`, in the same order as anytree's `leaves`. Done in a single pass over the subtree.
+        """
+        depths[node] = depth
+        children = node.children
+        if not children:
+            leaves.append(node)
+        for child in children:
+            self._walk_subtree(child, depth + 1, depths, leaves)
+
+    def _get_last_premise_node(self, rule_application):
+        # This assumes that the rule premises do not branch, so it just follows the first child down
+        if rule_application.justification is not None:
+            return None
+        last_prem = rule_application
+        while last_prem.children and last_prem.children[0].justification is None:
+            last_prem = last_prem.children[0]
         return last_prem
 
+    def _copy_subtree(self, node):
+        """
+        Returns a copy of a node and its descendants, without its ancestors. Cheaper than deepcopy, since the contents
+        and indexes of the nodes are shared with the original (the solver never modifies them after instantiation)
+        """
+        return node.__class__(content=node.content, index=node.index, justification=node.justification,
+                              children=[self._copy_subtree(child) for child in node.children])
+
     def _add_children_to_leaf(self, root, leaf):
         """
         Takes a tree (a root node, e.g. the last premise of a rule application) and a leaf from a different tree
@@ -135,20 +239,39 @@ class TableauxSolver:
 
         WARNING: It may modify the `root` tree, do not use again after passing it to this function (or deepcopy before)
         """
-        num_children = len(root.children)  # need to calculate it here bc it will change dynamically in what follows
-        for child in root.children:
-            if self.allow_repetition_of_nodes:
-                # If nodes can be repeated, simply attach the child to the leaf. The subree below it is kept
-                child.parent = leaf
-
-            else:
-                # If there is only one child and it already occurs in the tree, skip
-                if num_children == 1 and (child.content, child.index) in [(n.content, n.index) for n in leaf.path]:
-                    child.parent = None  # For uniformity, bc the other clauses alter the root's child
-                    self._add_children_to_leaf(child, leaf)  # Move to next node without doing anything with child
-                else:  # there is more than one child or the child is not repeated
+        # Iterative, with an explicit stack of (root, leaf) pairs still to process instead of recursive calls
+        stack = [(root, leaf)]
+        while stack:
+            root, leaf = stack.pop()
+            children = root.children  # A tuple, so it does not change dynamically in what follows
+            num_children = len(children)
+            pending = []
+            for child in children:
+                if self.allow_repetition_of_nodes:
+                    # If nodes can be repeated, simply attach the child to the leaf. The subree below it is kept
                     child.parent = leaf
-                    self._add_children_to_leaf(child, child)  # The child is both the new leaf and new root
+
+                else:
+                    # If there is only one child and it already occurs in the tree, skip
+                    if num_children == 1 and self._occurs_in_path(child, leaf):
+                        child.parent = None  # For uniformity, bc the other clauses alter the root's child
+                        pending.append((child, leaf))  # Move to next node without doing anything with child
+                    else:  # there is more than one child or the child is not repeated
+                        child.parent = leaf
+                        pending.append((child, child))  # The child is both the new leaf and new root
+            # Reversed, so that the pairs are processed in the same order as the recursive version did
+            stack.extend(reversed(pending))
+
+    @staticmethod
+    def _occurs_in_path(child, leaf):
+        """Returns True if a node with the same content and index as `child` is `leaf` or one of its ancestors.
+        Walks up the parents directly, instead of building the list of (content, index) pairs of the path"""
+        node = leaf
+        while node is not None:
+            if node.content == child.content and node.index == child.index:
+                return True
+            node = node.parent
+        return False
 
     def apply_rule(self, tableaux_system, rule_name, rule, subst_dict):
         return rule.instantiate(tableaux_system.language, subst_dict, instantiate_children=True)
@@ -156,17 +279,19 @@ class TableauxSolver:
     def _begin_tableaux(self, inference, beggining_index=None):
         """
         Initialize the tableaux by putting every premise and negated conclusion as a node
-        May need to be overwritten for some non-classical systems
+        May need to be overwritten for some non-classical systems (or just _conclusion_node_content below)
         """
-        parent = None
-        for premise in inference.premises:
-            new_node = TableauxNode(content=premise, index=self.beggining_premise_index, parent=parent)
-            parent = new_node
-        for conclusion in inference.conclusions:
-            new_node = TableauxNode(content=Formula(['~', conclusion]), index=self.beggining_conclusion_index,
-                                    parent=parent)
-            parent = new_node
-        return new_node.root
+        # Chain the nodes in order, the first one is the root (no need to walk up to it from the last node)
+        nodes = [TableauxNode(content=premise, index=self.beggining_premise_index) for premise in inference.premises]
+        nodes.extend(TableauxNode(content=self._conclusion_node_content(conclusion),
+                                  index=self.beggining_conclusion_index) for conclusion in inference.conclusions)
+        for parent, new_node in zip(nodes, nodes[1:]):
+            new_node.parent = parent
+        return nodes[0]
+
+    def _conclusion_node_content(self, conclusion):
+        """Returns the content of the initial node for a conclusion (its negation, in classical tableaux)"""
+        return Formula(['~', conclusion])
 
 
 standard_tableaux_solver = TableauxSolver()
@@ -204,18 +329,11 @@ class IndexedTableauxSolver(TableauxSolver):
     beggining_premise_index = 1
     beggining_conclusion_index = 0
 
-    def _begin_tableaux(self, inference, beggining_index=None):
+    def _conclusion_node_content(self, conclusion):
         """
         Conclusions are not negated in MV systems
         """
-        parent = None
-        for premise in inference.premises:
-            new_node = TableauxNode(content=premise, index=self.beggining_premise_index, parent=parent)
-            parent = new_node
-        for conclusion in inference.conclusions:
-            new_node = TableauxNode(content=conclusion, index=self.beggining_conclusion_index, parent=parent)
-            parent = new_node
-        return new_node.root
+        return conclusion
 
 
 indexed_tableaux_solver = IndexedTableauxSolver()
@@ -300,103 +418,112 @@ class MetainferentialTableauxSolver(TableauxSolver):
         """
         return MetainferentialTableauxNode(
             content=inference,
-            index=MetainferentialTableauxStandard(deepcopy(beggining_index), bar=True)
+            index=MetainferentialTableauxStandard(beggining_index, bar=True)
         )
 
     def apply_rule(self, tableaux_system, rule_name, rule, subst_dict):
         # This is kind of a hack. Since some rules in this system are more complicated, we hardcode their instantiaton.
         # e.g. they contain inference variables (which logics does not have) -inf0, inf1, lowering and lifting rules
         # or require you to do complex operations on the standards (e.g. the singleton, intersection, and bar rules)
-
-        # Rules for inferences
-        if rule_name == "inf0" or rule_name == "inf1":
-            premises, conclusions = subst_dict['Γ'], subst_dict['Δ']
-            root_inference = Inference(premises=premises, conclusions=conclusions)
-            X, Y = subst_dict['X'], subst_dict['Y']
-
-            if rule_name == "inf0":
-                # Root node
-                last_node = MetainferentialTableauxNode(content=root_inference,
-                                                        index=MetainferentialTableauxStandard([X, Y], bar=True),
-                                                        justification=None)
-                # Premises
-                for premise in premises:
-                    last_node = MetainferentialTableauxNode(content=deepcopy(premise), index=deepcopy(X),
-                                                            justification="inf0", parent=last_node)
-                # Conclusions
-                Ybar = deepcopy(Y)
-                Ybar.bar = True
-                for conclusion in conclusions:
-                    last_node = MetainferentialTableauxNode(content=deepcopy(conclusion), index=deepcopy(Ybar),
-                                                            justification="inf0", parent=last_node)
-                return last_node.root
-
-            elif rule_name == "inf1":
-                # Root node
-                root_node = MetainferentialTableauxNode(
-                    content=Inference(premises=premises, conclusions=conclusions),
-                    index=MetainferentialTableauxStandard([subst_dict['X'], subst_dict['Y']]),
-                    justification=None
-                )
-                # Premises
-                Xbar = deepcopy(X)
-                Xbar.bar = True
-                for premise in premises:
-                    MetainferentialTableauxNode(content=deepcopy(premise), index=deepcopy(Xbar), justification="inf1",
-                                                parent=root_node)
-                # Conclusions
-                for conclusion in conclusions:
-                    MetainferentialTableauxNode(content=deepcopy(conclusion), index=deepcopy(Y), justification="inf1",
-                                                parent=root_node)
-                return root_node
-
-        # Rules for formulae
-        elif rule_name == "singleton" or rule_name == "intersection" or rule_name == "complement":
-            formula = subst_dict['A']
-            beginning_standard = subst_dict['X']
-
-            if rule_name == "singleton":
-                root = MetainferentialTableauxNode(content=deepcopy(formula), index=deepcopy(beginning_standard))
-                for value in beginning_standard.content:
-                    MetainferentialTableauxNode(
-                        content=deepcopy(formula),
-                        index=MetainferentialTableauxStandard(content={value}),
-                        justification='singleton',
-                        parent=root,
-                    )
-                return root
-
-            elif rule_name == "intersection":
-                beginning_standard2 = subst_dict['Y']
-                root = MetainferentialTableauxNode(content=deepcopy(formula), index=deepcopy(beginning_standard))
-                root2 = MetainferentialTableauxNode(content=deepcopy(formula), index=deepcopy(beginning_standard2),
-                                                    parent=root)
-                intersection_standard = MetainferentialTableauxStandard(
-                    content=beginning_standard.content.intersection(beginning_standard2.content), bar=False
-                )
-                MetainferentialTableauxNode(
-                    content=deepcopy(formula),
-                    index=intersection_standard,
-                    justification='intersection',
-                    parent=root2)
-                return root
-
-            elif rule_name == "complement":
-                new_standard = MetainferentialTableauxStandard(
-                    content=tableaux_system.base_indexes.difference(beginning_standard.content), bar=False
-                )
-                root = MetainferentialTableauxNode(content=deepcopy(formula), index=deepcopy(beginning_standard))
-                MetainferentialTableauxNode(
-                    content=deepcopy(formula),
-                    index=new_standard,
-                    justification='complement',
-                    parent=root
-                )
-                return root
-
-        else:
-            # In every other case, the rules behave as usual, so we return the super method
-            return super().apply_rule(tableaux_system, rule_name, rule, subst_dict)
+        # Each of these has its own method, looked up by rule name in _rule_handlers (see below)
+        handler = self._rule_handlers.get(rule_name)
+        if handler is not None:
+            return handler(self, tableaux_system, subst_dict)
+        # In every other case, the rules behave as usual, so we return the super method
+        return super().apply_rule(tableaux_system, rule_name, rule, subst_dict)
+
+    # Rules for inferences
+    def _apply_inf0(self, tableaux_system, subst_dict):
+        premises, conclusions = subst_dict['Γ'], subst_dict['Δ']
+        X, Y = subst_dict['X'], subst_dict['Y']
+        # Root node
+        last_node = MetainferentialTableauxNode(content=Inference(premises=premises, conclusions=conclusions),
+                                                index=MetainferentialTableauxStandard([X, Y], bar=True),
+                                                justification=None)
+        # Premises
+        # The formulae and standards are shared between nodes, since the solver never modifies them
+        for premise in premises:
+            last_node = MetainferentialTableauxNode(content=premise, index=X, justification="inf0", parent=last_node)
+        # Conclusions
+        Ybar = copy(Y)  # Shallow, only the bar differs
+        Ybar.bar = True
+        for conclusion in conclusions:
+            last_node = MetainferentialTableauxNode(content=conclusion, index=Ybar, justification="inf0",
+                                                    parent=last_node)
+        return last_node.root
+
+    def _apply_inf1(self, tableaux_system, subst_dict):
+        premises, conclusions = subst_dict['Γ'], subst_dict['Δ']
+        X, Y = subst_dict['X'], subst_dict['Y']
+        # Root node
+        root_node = MetainferentialTableauxNode(
+            content=Inference(premises=premises, conclusions=conclusions),
+            index=MetainferentialTableauxStandard([X, Y]),
+            justification=None
+        )
+        # Premises
+        Xbar = copy(X)  # Shallow, only the bar differs
+        Xbar.bar = True
+        for premise in premises:
+            MetainferentialTableauxNode(content=premise, index=Xbar, justification="inf1", parent=root_node)
+        # Conclusions
+        for conclusion in conclusions:
+            MetainferentialTableauxNode(content=conclusion, index=Y, justification="inf1", parent=root_node)
+        return root_node
+
+    # Rules for formulae
+    # As above, the formula and standard are shared with the node the rule is applied to
+    def _apply_singleton(self, tableaux_system, subst_dict):
+        formula = subst_dict['A']
+        beginning_standard = subst_dict['X']
+        root = MetainferentialTableauxNode(content=formula, index=beginning_standard)
+        for value in beginning_standard.content:
+            MetainferentialTableauxNode(
+                content=formula,
+                index=MetainferentialTableauxStandard(content={value}),
+                justification='singleton',
+                parent=root,
+            )
+        return root
+
+    def _apply_intersection(self, tableaux_system, subst_dict):
+        formula = subst_dict['A']
+        beginning_standard = subst_dict['X']
+        beginning_standard2 = subst_dict['Y']
+        root = MetainferentialTableauxNode(content=formula, index=beginning_standard)
+        root2 = MetainferentialTableauxNode(content=formula, index=beginning_standard2, parent=root)
+        intersection_standard = MetainferentialTableauxStandard(
+            content=beginning_standard.content.intersection(beginning_standard2.content), bar=False
+        )
+        MetainferentialTableauxNode(
+            content=formula,
+            index=intersection_standard,
+            justification='intersection',
+            parent=root2)
+        return root
+
+    def _apply_complement(self, tableaux_system, subst_dict):
+        formula = subst_dict['A']
+        beginning_standard = subst_dict['X']
+        new_standard = MetainferentialTableauxStandard(
+            content=tableaux_system.base_indexes.difference(beginning_standard.content), bar=False
+        )
+        root = MetainferentialTableauxNode(content=formula, index=beginning_standard)
+        MetainferentialTableauxNode(
+            content=formula,
+            index=new_standard,
+            justification='complement',
+            parent=root
+        )
+        return root
+
+    _rule_handlers = {
+        'inf0': _apply_inf0,
+        'inf1': _apply_inf1,
+        'singleton': _apply_singleton,
+        'intersection': _apply_intersection,
+        'complement': _apply_complement,
+    }
 
 
 metainferential_tableaux_solver = MetainferentialTableauxSolver()
@@ -11,10 +11,7 @@ def upgrade_to_predicate_formula(formula):
     """Upgrades a Formula to a PredicateFormula NOT in-place, returns a new object"""
     if formula.is_atomic:
         return PredicateFormula(formula)
-    for subformula_idx in range(len(formula)):
-        if type(formula[subformula_idx]) == Formula:
-            formula[subformula_idx] = upgrade_to_predicate_formula(formula[subformula_idx])
-    return PredicateFormula(formula)
+    return PredicateFormula([upgrade_to_predicate_formula(x) if type(x) == Formula else x for x in formula])
 
 
 def upgrade_inference(inference):
@@ -37,7 +34,8 @@ def upgrade_derivation(derivation):
         if step == "(...)":  # for natural deduction rules
             new_derivation.append(step)
         else:
-            new_step = deepcopy(step)
-            new_step.content = upgrade_to_predicate_formula(new_step.content)
+            # The content is upgraded below (into a new object), so there is no need to deepcopy it here
+            new_step = deepcopy(step, memo={id(step.content): step.content})
+            new_step.content = upgrade_to_predicate_formula(step.content)
             new_derivation.append(new_step)
     return new_derivation
@@ -1,7 +1,9 @@
 import unittest
 
 from logics.utils.parsers.predicate_parser import classical_predicate_parser as parser
+from logics.classes.propositional import Formula
 from logics.classes.predicate import InfinitePredicateLanguage, PredicateFormula
+from logics.utils.upgrade import upgrade_to_predicate_formula
 from logics.instances.predicate.languages import (
     classical_infinite_predicate_language as cl_language,
     classical_predicate_language as finite_lang
@@ -10,7 +12,8 @@ from logics.instances.predicate.languages import real_number_arithmetic_language
 
 
 class TestLanguageFormulaClasses(unittest.TestCase):
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         individual_constants = ['a', 'b']
         variables = ['x']
         individual_metavariables = ['α', 'β']
@@ -22,37 +25,37 @@ class TestLanguageFormulaClasses(unittest.TestCase):
         predicate_variables = {'X': 1}
         sentential_constants = ['⊥', '⊤']
         function_symbols = {'f': 1, 'g': 2}
-        self.function_language = InfinitePredicateLanguage(individual_constants=individual_constants,
-                                                           variables=variables,
-                                                           individual_metavariables=individual_metavariables,
-                                                           variable_metavariables=variable_metavariables,
-                                                           quantifiers=quantifiers,
-                                                           metavariables=metavariables,
-                                                           constant_arity_dict=constant_arity_dict,
-                                                           predicate_letters=predicate_letters,
-                                                           predicate_variables=predicate_variables,
-                                                           sentential_constants=sentential_constants,
-                                                           function_symbols=function_symbols,
-                                                           allow_predicates_as_terms=True)
+        cls.function_language = InfinitePredicateLanguage(individual_constants=individual_constants,
+                                                          variables=variables,
+                                                          individual_metavariables=individual_metavariables,
+                                                          variable_metavariables=variable_metavariables,
+                                                          quantifiers=quantifiers,
+                                                          metavariables=metavariables,
+                                                          constant_arity_dict=constant_arity_dict,
+                                                          predicate_letters=predicate_letters,
+                                                          predicate_variables=predicate_variables,
+                                                          sentential_constants=sentential_constants,
+                                                          function_symbols=function_symbols,
+                                                          allow_predicates_as_terms=True)
         # Some formulae
         # Atomic
-        self.a1 = PredicateFormula(['P', 'x'])
-        self.a2 = PredicateFormula(['P', 'a'])
-        self.a3 = PredicateFormula(['P', 'a', 'b'])
-        self.a4 = PredicateFormula(['P', ('f', 'a')])
-        self.a5 = PredicateFormula(['P', ('f', ('g', 'a', 'a'))])
-        self.a6 = PredicateFormula(['P', ('f', ('g', 'a'))])
-        self.a7 = PredicateFormula(['X', ('f', ('g', 'x', 'x'))])
+        cls.a1 = PredicateFormula(['P', 'x'])
+        cls.a2 = PredicateFormula(['P', 'a'])
+        cls.a3 = PredicateFormula(['P', 'a', 'b'])
+        cls.a4 = PredicateFormula(['P', ('f', 'a')])
+        cls.a5 = PredicateFormula(['P', ('f', ('g', 'a', 'a'))])
+        cls.a6 = PredicateFormula(['P', ('f', ('g', 'a'))])
+        cls.a7 = PredicateFormula(['X', ('f', ('g', 'x', 'x'))])
 
         # Molecular
-        self.m1 = PredicateFormula(['∧', self.a7, ['~', self.a2]])
-        self.m2 = PredicateFormula(['∀', 'x', ['P', 'x']])
-        self.m3 = PredicateFormula(['∀', 'a', self.m1])
-        self.m4 = PredicateFormula(['∀', ('f', 'x'), self.m1])
-        self.m5 = PredicateFormula(['∀', 'x', self.a7])
-        self.m6 = PredicateFormula(['∀', 'x', ['∀', 'X', ['P', 'x']]])
-        self.m7 = PredicateFormula(['∀', 'x', '∈', ('f', 'x'), self.a1])
-        self.m8 = PredicateFormula(['∀', 'x', '∈', 'P', self.a1])
+        cls.m1 = PredicateFormula(['∧', cls.a7, ['~', cls.a2]])
+        cls.m2 = PredicateFormula(['∀', 'x', ['P', 'x']])
+        cls.m3 = PredicateFormula(['∀', 'a', cls.m1])
+        cls.m4 = PredicateFormula(['∀', ('f', 'x'), cls.m1])
+        cls.m5 = PredicateFormula(['∀', 'x', cls.a7])
+        cls.m6 = PredicateFormula(['∀', 'x', ['∀', 'X', ['P', 'x']]])
+        cls.m7 = PredicateFormula(['∀', 'x', '∈', ('f', 'x'), cls.a1])
+        cls.m8 = PredicateFormula(['∀', 'x', '∈', 'P', cls.a1])
 
     def test_constants(self):
         self.assertEqual(cl_language.constants(), {'~', '∧', '∨', '→', '↔'})
@@ -164,6 +167,10 @@ class TestLanguageFormulaClasses(unittest.TestCase):
         self.assertTrue(cl_language.is_well_formed(PredicateFormula(['∀', 'χ', ['P', 'χ']])))
         self.assertTrue(cl_language.is_well_formed(PredicateFormula(['∀', 'χ', '∈', 'a', ['P', 'χ']])))
         self.assertTrue(cl_language.is_well_formed(PredicateFormula(['∀', 'χ', '∈', 'α', ['P', 'χ']])))
+        # Quantified "variables" that are not strings
+        for language in (self.function_language, cl_language):
+            self.assertIs(language.is_well_formed(PredicateFormula(['∀', ['P', 'x'], ['P', 'x']])), False)
+            self.assertIs(language.is_well_formed(PredicateFormula(['∀', ('f', ('g', 'x')), ['P', 'x']])), False)
 
     def test_free_variables(self):
         self.assertEqual(self.a1.free_variables(self.function_language), {'x'})
@@ -204,6 +211,15 @@ class TestLanguageFormulaClasses(unittest.TestCase):
         ]
         self.assertEqual(PredicateFormula(['∃', 'x', ['∀', 'X', ['X', 'x']]]).subformulae, subf)
 
+    def test_upgrade_to_predicate_formula(self):
+        f = Formula(['∧', ['A'], ['~', ['B']]])
+        f2 = upgrade_to_predicate_formula(f)
+        self.assertEqual(f2, f)
+        self.assertIs(type(f2[2][1]), PredicateFormula)
+        # The original formula is unaffected
+        self.assertIs(type(f[2]), Formula)
+        self.assertIs(type(f[2][1]), Formula)
+
     def test_is_schematic(self):
         self.assertFalse(PredicateFormula._is_schematic_term('a', cl_language))
         self.assertTrue(PredicateFormula._is_schematic_term('α', cl_language))
@@ -255,6 +271,9 @@ class TestLanguageFormulaClasses(unittest.TestCase):
                          PredicateFormula(['∀', 'x', '∈', ('f', 'b'), ['P', 'x']]))
         self.assertEqual(PredicateFormula(['∀', 'X', ['∀', 'x', ['X', 'y']]]).vsubstitute('y', ('f', 'x')),
                          PredicateFormula(['∀', 'X', ['∀', 'x', ['X', ('f', 'x')]]]))
+        # The variable is bound only inside the quantified subformula
+        self.assertEqual(PredicateFormula(['∧', ['∀', 'x', ['P', 'x']], ['P', 'x']]).vsubstitute('x', 'a'),
+                         PredicateFormula(['∧', ['∀', 'x', ['P', 'x']], ['P', 'a']]))
 
         # var metavariables
         self.assertEqual(PredicateFormula(['P', 'χ']).vsubstitute('χ', 'a'), PredicateFormula(['P', 'a']))
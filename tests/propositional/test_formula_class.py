@@ -64,6 +64,10 @@ class TestFormulaClass(unittest.TestCase):
         for x in [p123, notpandp123]:
             self.assertFalse(x.is_well_formed(self.language))
             self.assertTrue(x.is_well_formed(self.infinite_language))
+        # The error of an argument that is not well-formed also makes the whole formula not well-formed
+        well_formed, error = self.language.is_well_formed(notpandp123, return_error=True)
+        self.assertFalse(well_formed)
+        self.assertIn('is not a well-formed formula', error)
 
         # Test main symbol
         self.assertEqual(notnotp.main_symbol, '~')
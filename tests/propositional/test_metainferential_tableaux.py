@@ -23,6 +23,11 @@ class TestMetainferentialTableauxSystem(unittest.TestCase):
         self.assertTrue(isinstance(standard.content[0], MetainferentialTableauxStandard))  # X
         self.assertTrue(isinstance(standard.content[1], MetainferentialTableauxStandard))  # Y
 
+        # The list given is not modified
+        content = [[{'1', 'i'}, {'1'}], [{'1', 'i'}, {'1'}]]
+        MetainferentialTableauxStandard(content)
+        self.assertEqual(content, [[{'1', 'i'}, {'1'}], [{'1', 'i'}, {'1'}]])
+
     def test_standard_level(self):
         standard = MetainferentialTableauxStandard([[{'1', 'i'}, {'1'}], [{'1', 'i'}, {'1'}]], bar=False)
         self.assertEqual(standard.level, 2)  # TS/TS
@@ -193,6 +193,15 @@ class TestTableauxSystem(unittest.TestCase):
                                           {'Γ': ['Σ'], 'Δ': ['A']},
                                           {'Γ': [], 'Δ': ['Σ', 'A']}])
 
+        # A repeated var must correspond to the same elements in each of its apparitions
+        rule_context = ['Π', 'Π', 'Γ']
+        instance_context = ['A', 'B', 'A', 'B']
+        possible_dicts = list()
+        for possible_dict in instance_sequent._get_context_distribs_iterator(rule_context, instance_context):
+            possible_dicts.append(possible_dict)
+        self.assertEqual(possible_dicts, [{'Π': ['A', 'B'], 'Γ': []},
+                                          {'Π': [], 'Γ': ['A', 'B', 'A', 'B']}])
+
     def test_get_context_dicts(self):
         # Test 1 - Simple case
         rule_sequent = classical_parser.parse('Gamma, A, Delta ==>')
@@ -342,6 +351,13 @@ class TestTableauxSystem(unittest.TestCase):
         instance = sequent2.is_instance_of(sequent1, language)
         self.assertFalse(instance)
 
+        # --- Context only after the formula
+        sequent1 = classical_parser.parse('A & B, Gamma ==> Delta')
+        sequent2 = classical_parser.parse('p & q ==> p')
+        instance, possible_dicts = sequent2.is_instance_of(sequent1, language, return_subst_dicts=True)
+        self.assertTrue(instance)
+        self.assertEqual(possible_dicts, [{'A': ['p'], 'B': ['q'], 'Γ': [], 'Δ': [['p']]}])
+
     def test_is_correct_tree(self):
         # A weakening correct tree
         conclusion = SequentNode(content=classical_parser.parse('Gamma, A ==> A, Delta'), justification='WL')
@@ -452,6 +452,9 @@ class TestConstructiveTrees(unittest.TestCase):
         self.assertEqual(cl_system.rules['R∧'].children[0].content, Formula(['A1']))
         self.assertEqual(cl_system.rules['R∧'].children[1].content, Formula(['A2']))
 
+        # The system does not call TableauxSystem.__init__, the premises of the rules must be available anyway
+        self.assertEqual([n.content for n in cl_system._get_rule_premises('R∧')], [Formula(['∧', ['A1'], ['A2']])])
+
         # Further tests are in tests.utils.test_tableaux_solver
 
 
@@ -63,6 +63,15 @@ class TestNaturalDeductionSolver(unittest.TestCase):
         step = solver._get_step_of_formula(classical_parser.parse('p ∧ q'), deriv, deriv[-1].open_suppositions)
         self.assertEqual(step, 3)
 
+    def test_get_heuristics(self):
+        from logics.utils.solvers.natural_deduction import efsq_heuristic, conjunction_heuristic, \
+            conditional_heuristic, disjunction_heuristic, reductio_heuristic
+        self.assertEqual(solver._get_heuristics('∧'), (efsq_heuristic, conjunction_heuristic, reductio_heuristic))
+        self.assertEqual(solver._get_heuristics('→'), (efsq_heuristic, conditional_heuristic, reductio_heuristic))
+        self.assertEqual(solver._get_heuristics('∨'), (efsq_heuristic, disjunction_heuristic, reductio_heuristic))
+        self.assertEqual(solver._get_heuristics(None), (efsq_heuristic, reductio_heuristic))
+        self.assertEqual(solver._get_heuristics('~'), (efsq_heuristic, reductio_heuristic))
+
     def test_solver_heuristics_repetition(self):
         # Should repeat q inside the conditional
         inf = classical_parser.parse('p, q / p → q')
@@ -239,6 +239,21 @@ class TestPredicateNaturalDeductionSolver(unittest.TestCase):
         """, natural_deduction=True)
         self.assertEqual(derivation, deriv)
 
+        # If the goal is already in the derivation, it is repeated inside the supposition to introduce the conditional
+        inf = parser.parse('∃x P(x), Q(a) / Q(a)')
+        derivation = Derivation([NaturalDeductionStep(content=p, justification='premise') for p in inf.premises])
+        derivation = existential_elim_heuristic.apply_heuristic(derivation, inf.conclusion, solver, [])
+        deriv = parser.parse_derivation("""
+            ∃x P(x); premise; []; []
+            Q(a); premise; []; []
+            P(b); supposition; []; [2]
+            Q(a); repetition; [1]; [2]
+            P(b) → Q(a); I→; [2, 3]; []
+            Q(a); E∃; [0, 4]; []
+        """, natural_deduction=True)
+        self.assertEqual(derivation, deriv)
+        self.assertTrue(nd_system.is_correct_derivation(derivation, inference=inf))
+
     def test_predicate_solver(self):
         preset_excercises = [
             '∀x P(x) / ∀y P(y)',
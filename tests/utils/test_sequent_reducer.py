@@ -5,8 +5,8 @@ from logics.classes.exceptions import SolverError
 from logics.utils.formula_generators.generators_biased import random_formula_generator
 from logics.instances.propositional.languages import classical_infinite_language_noconditional as cl_language
 from logics.instances.propositional.many_valued_semantics import classical_mvl_semantics
-from logics.instances.propositional.sequents import LKminEA
-from logics.utils.solvers.sequents import LKminEA_sequent_reducer
+from logics.instances.propositional.sequents import LKminEA, LKmin
+from logics.utils.solvers.sequents import LKminEA_sequent_reducer, LKmin_sequent_reducer
 
 
 class TestSequentReducer(unittest.TestCase):
@@ -45,6 +45,33 @@ class TestSequentReducer(unittest.TestCase):
         # tree.print_tree(classical_parser)
         self.assertTrue(LKminEA.is_correct_tree(tree, premises=[premise]))
 
+    def test_LKmin(self):
+        sequent = classical_parser.parse('p & q ==> p')
+        tree = LKmin_sequent_reducer.reduce(sequent, LKmin)
+        # tree.print_tree(classical_parser)
+        self.assertTrue(LKmin.is_correct_tree(tree))
+
+        # Contraction of more than one formula at once (Π = [p, q] in the premise Π, Π, Γ ⇒ Δ)
+        sequent = classical_parser.parse('p, q ==> q')
+        tree = LKmin_sequent_reducer.reduce(sequent, LKmin, max_depth=4)
+        self.assertTrue(LKmin.is_correct_tree(tree))
+
+    def test_check_max_apparitions(self):
+        # LKmin_sequent_reducer allows up to 3 apparitions per side, LKminEA_sequent_reducer does not have a limit
+        sequent = classical_parser.parse('A, B, A, A ==> Gamma, Gamma, Gamma')
+        self.assertTrue(LKmin_sequent_reducer._check_max_apparitions(sequent))
+        sequent = classical_parser.parse('A, B, A, A, A ==> Gamma')
+        self.assertFalse(LKmin_sequent_reducer._check_max_apparitions(sequent))
+        self.assertTrue(LKminEA_sequent_reducer._check_max_apparitions(sequent))
+        sequent = classical_parser.parse('A ==> Gamma, Gamma, Gamma, Gamma')
+        self.assertFalse(LKmin_sequent_reducer._check_max_apparitions(sequent))
+
+    def test_max_depth(self):
+        sequent = classical_parser.parse('A & B ==> A')
+        self.assertRaises(SolverError, LKminEA_sequent_reducer.reduce, sequent, LKminEA, max_depth=1)
+        tree = LKminEA_sequent_reducer.reduce(sequent, LKminEA, max_depth=2)
+        self.assertTrue(LKminEA.is_correct_tree(tree))
+
     def test_with_generator(self):
         # Test with valid arguments
         for _ in range(1000):